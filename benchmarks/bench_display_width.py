@@ -0,0 +1,75 @@
+"""
+显示宽度计算的微基准测试: 对比 display_width.get_display_width 与此前逐字符比较的实现。
+
+- 单次调用: 每类样本逐个计算宽度。
+- txt 排版: 模拟导出 txt 时的用法。此前每个单元格在统计列宽和补齐行时各计算一次,
+  现在只计算一次并与表格一同存放。样本为数字、英文与中文 (含重复值) 混合的典型表格内容。
+
+用法: python benchmarks/bench_display_width.py [--number N]
+"""
+import argparse
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from display_width import get_display_width
+
+def legacy_get_display_width(s):
+    """此前的实现: 逐字符判断, 只把 \\u4e00-\\u9fa5 与 \\uff00-\\uffef 视为宽字符。"""
+    width = 0
+    if s is None: return 0
+    text = str(s)
+    for char in text:
+        if '\u4e00' <= char <= '\u9fa5' or '\uff00' <= char <= '\uffef':
+            width += 2
+        else:
+            width += 1
+    return width
+
+def make_samples(seed=0, count=20000):
+    """生成几类典型的单元格文本: 纯 ASCII、纯中文、中英混合以及带标记的数字。"""
+    rng = random.Random(seed)
+    ascii_chars = "abcdefghijklmnopqrstuvwxyz0123456789 .-_"
+    cjk_chars = [chr(cp) for cp in range(0x4e00, 0x4e00 + 3000)]
+    samples = {
+        'ascii': ["".join(rng.choices(ascii_chars, k=rng.randint(1, 24))) for _ in range(count)],
+        'cjk': ["".join(rng.choices(cjk_chars, k=rng.randint(1, 16))) for _ in range(count)],
+        'mixed': ["".join(rng.choices(cjk_chars, k=rng.randint(1, 8))) + "".join(rng.choices(ascii_chars, k=rng.randint(1, 12))) for _ in range(count)],
+        'numbers': [f"{rng.uniform(0, 1e6):.2f}[f{i}]" for i in range(count)],
+    }
+    categories = [f"类别{i}" for i in range(50)]
+    samples['table'] = [rng.choice((rng.choice(samples['numbers']), rng.choice(samples['ascii']), rng.choice(samples['mixed']), rng.choice(categories)))
+                        for _ in range(count)]
+    return samples
+
+def legacy_layout(texts):
+    widths = {}
+    for i, text in enumerate(texts): widths[i % 8] = max(widths.get(i % 8, 0), legacy_get_display_width(text))
+    return [text + " " * (widths[i % 8] - legacy_get_display_width(text)) for i, text in enumerate(texts)]
+
+def current_layout(texts):
+    cell_widths = list(map(get_display_width, texts))
+    widths = {}
+    for i, width in enumerate(cell_widths): widths[i % 8] = max(widths.get(i % 8, 0), width)
+    return [text + " " * (widths[i % 8] - width) for i, (text, width) in enumerate(zip(texts, cell_widths))]
+
+def main():
+    parser = argparse.ArgumentParser(description="显示宽度计算的微基准测试")
+    parser.add_argument('--number', type=int, default=5, help="每组样本重复次数")
+    args = parser.parse_args()
+
+    samples = make_samples()
+    cases = [(f"单次调用/{name}", lambda texts=texts: [legacy_get_display_width(t) for t in texts], lambda texts=texts: [get_display_width(t) for t in texts])
+             for name, texts in samples.items()]
+    cases.append(("txt 排版/table", lambda: legacy_layout(samples['table']), lambda: current_layout(samples['table'])))
+
+    print(f"{'场景':<20}  {'旧实现':>10}  {'新实现':>10}  {'加速比':>6}")
+    for name, legacy_fn, current_fn in cases:
+        legacy = min(timeit.repeat(legacy_fn, number=args.number, repeat=3))
+        current = min(timeit.repeat(current_fn, number=args.number, repeat=3))
+        print(f"{name:<20}  {legacy:9.3f}s  {current:9.3f}s  {legacy / current:5.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+导出性能的基准测试。
+
+按 WORKLOADS 中的配置用 generate_workbook 生成合成工作簿, 对每个工作簿分别只启用一种输出格式运行
+export_excel_to_text, 记录耗时与峰值内存。每次测量都在独立的子进程中进行, 峰值内存互不影响; 重复多次时
+耗时取最小值, 峰值内存取最大值。
+
+结果以 JSON 写出 (--output), 可保存为基线 (--save-baseline), 之后的运行用 --baseline 与其比较:
+耗时或峰值内存超过基线 (1 + --threshold) 倍的项记为退化, 此时以退出码 1 结束, 便于在脚本中使用。
+
+用法:
+    python benchmarks/bench_export.py [--workloads dense,formulas] [--formats txt,json] [--repeat 3]
+                                      [--scale 0.1] [--output results.json] [--baseline baseline.json]
+"""
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.realpath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from display_width import get_display_width
+from generate_workbook import generate_workbook
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+FORMATS = ('txt', 'md_plain', 'md_rich', 'toml', 'json', 'yaml', 'jsonl', 'sqlite', 'csv')
+
+# 各工作负载的生成参数, 未列出的项取 generate_workbook.DEFAULT_SPEC; rows 会乘以 --scale
+WORKLOADS = {
+    'dense': {'rows': 20000, 'cols': 12},
+    'sparse': {'rows': 40000, 'cols': 30, 'sparsity': 0.9, 'merged_ranges': 0},
+    'cjk': {'rows': 20000, 'cols': 12, 'cjk_ratio': 0.9},
+    'formulas': {'rows': 20000, 'cols': 12, 'formula_density': 0.5, 'shared_formula_cols': 3, 'array_formulas': 50},
+    'annotated': {'rows': 10000, 'cols': 12, 'comment_density': 0.05, 'hyperlink_density': 0.05,
+                  'merged_ranges': 500, 'conditional_formats': 12},
+    'many_sheets': {'rows': 1000, 'cols': 10, 'sheets': 30},
+}
+
+def _peak_memory_mb():
+    if resource is None: return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 以 KB 为单位, macOS 以字节为单位
+    return round(peak / (1 << 20) if sys.platform == 'darwin' else peak / 1024, 1)
+
+def run_child(workbook, fmt, engine):
+    """子进程中执行的一次测量: 只启用 fmt 一种格式导出 workbook, 打印 JSON 结果。"""
+    import export_excel
+    with contextlib.redirect_stdout(io.StringIO()):
+        config = export_excel.load_config(os.path.join(REPO_DIR, 'config.toml'))
+    config['outputs']['default_formats'] = [fmt]
+    name = os.path.splitext(os.path.basename(workbook))[0]
+    with tempfile.TemporaryDirectory(prefix='bench_') as output_dir:
+        output_files = export_excel.build_output_files(output_dir, name, [fmt])
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            export_excel.export_excel_to_text(workbook, config, output_dir, name, engine=engine, **output_files)
+        seconds = time.perf_counter() - start
+    print(json.dumps({'seconds': seconds, 'peak_mb': _peak_memory_mb()}))
+
+def measure(workbook, fmt, engine, repeat):
+    """在 repeat 个独立子进程中测量, 返回 {seconds: 最小耗时, median_seconds, peak_mb: 最大峰值内存}。"""
+    runs = []
+    for _ in range(repeat):
+        proc = subprocess.run([sys.executable, os.path.realpath(__file__), '--child', workbook, fmt, engine],
+                              capture_output=True, text=True, encoding='utf-8')
+        if proc.returncode != 0:
+            raise RuntimeError(f"{os.path.basename(workbook)} / {fmt} 测量失败:\n{proc.stderr.strip()}")
+        runs.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+    seconds = [run['seconds'] for run in runs]
+    peaks = [run['peak_mb'] for run in runs if run['peak_mb'] is not None]
+    return {'seconds': round(min(seconds), 4), 'median_seconds': round(statistics.median(seconds), 4),
+            'peak_mb': max(peaks) if peaks else None}
+
+def _git_revision():
+    try:
+        proc = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR, capture_output=True, text=True)
+        return proc.stdout.strip() or None
+    except OSError:
+        return None
+
+def _print_table(headers, rows):
+    """按显示宽度对齐打印表格, 第一、二列左对齐, 其余右对齐。"""
+    widths = [max(get_display_width(row[i]) for row in [headers] + rows) for i in range(len(headers))]
+    for row in [headers] + rows:
+        cells = [text + " " * (width - get_display_width(text)) if i < 2 else " " * (width - get_display_width(text)) + text
+                 for i, (text, width) in enumerate(zip(row, widths))]
+        print("  ".join(cells))
+
+def _change(now, then, threshold):
+    """返回 (变化文本, 是否退化)。"""
+    if now is None or not then: return "-", False
+    change = now / then - 1
+    return f"{change:+.1%}" + (" !" if change > threshold else ""), change > threshold
+
+def compare(results, baseline, threshold):
+    """与基线比较, 打印对比表, 返回退化项的数量。"""
+    number = lambda value, spec: "-" if value is None else format(value, spec)
+    regressions = 0
+    rows = []
+    for workload, formats in results['results'].items():
+        for fmt, current in formats.items():
+            base = baseline.get('results', {}).get(workload, {}).get(fmt, {})
+            seconds_change, slower = _change(current['seconds'], base.get('seconds'), threshold)
+            memory_change, larger = _change(current['peak_mb'], base.get('peak_mb'), threshold)
+            regressions += slower or larger
+            rows.append([workload, fmt,
+                         number(current['seconds'], '.3f'), number(base.get('seconds'), '.3f'), seconds_change,
+                         number(current['peak_mb'], '.1f'), number(base.get('peak_mb'), '.1f'), memory_change])
+    print()
+    _print_table(["工作负载", "格式", "耗时(s)", "基线(s)", "变化", "内存(MB)", "基线(MB)", "变化"], rows)
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="测量各输出格式的导出耗时与峰值内存, 并可与基线比较。")
+    parser.add_argument('--workloads', default=",".join(WORKLOADS), help=f"逗号分隔的工作负载, 可选: {', '.join(WORKLOADS)}")
+    parser.add_argument('--formats', default=",".join(FORMATS), help=f"逗号分隔的输出格式, 可选: {', '.join(FORMATS)}")
+    parser.add_argument('--engine', default='xml', help="读取引擎, 默认 xml")
+    parser.add_argument('--repeat', type=int, default=3, help="每项测量的重复次数, 默认 3")
+    parser.add_argument('--scale', type=float, default=1.0, help="行数的缩放系数, 如 0.1 用于快速检查")
+    parser.add_argument('--workdir', help="生成的工作簿的存放目录 (默认使用临时目录, 结束后删除)")
+    parser.add_argument('--output', help="将结果写入此 JSON 文件")
+    parser.add_argument('--baseline', help="与此前保存的基线 JSON 比较")
+    parser.add_argument('--save-baseline', help="将结果另存为基线 JSON")
+    parser.add_argument('--threshold', type=float, default=0.10, help="判定为退化的相对增幅, 默认 0.10")
+    parser.add_argument('--child', nargs=3, metavar=('WORKBOOK', 'FORMAT', 'ENGINE'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(*args.child)
+        return
+
+    workloads = [w for w in args.workloads.split(",") if w]
+    formats = [f for f in args.formats.split(",") if f]
+    unknown = [w for w in workloads if w not in WORKLOADS] + [f for f in formats if f not in FORMATS]
+    if unknown: parser.error(f"未知的工作负载或格式: {', '.join(unknown)}")
+
+    results = {
+        'meta': {
+            'date': datetime.datetime.now().isoformat(timespec='seconds'),
+            'revision': _git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'engine': args.engine,
+            'repeat': args.repeat,
+            'scale': args.scale,
+        },
+        'results': {},
+    }
+    with (contextlib.nullcontext(args.workdir) if args.workdir else tempfile.TemporaryDirectory(prefix='bench_wb_')) as workdir:
+        os.makedirs(workdir, exist_ok=True)
+        for workload in workloads:
+            spec = dict(WORKLOADS[workload])
+            spec['rows'] = max(int(spec['rows'] * args.scale), 2)
+            workbook = os.path.join(workdir, f"{workload}.xlsx")
+            generate_workbook(workbook, **spec)
+            results['results'][workload] = {}
+            for fmt in formats:
+                result = measure(workbook, fmt, args.engine, args.repeat)
+                results['results'][workload][fmt] = result
+                peak = "-" if result['peak_mb'] is None else f"{result['peak_mb']:.1f} MB"
+                print(f"{workload:<14}{fmt:<10}{result['seconds']:>9.3f} s  {peak:>10}", flush=True)
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w', encoding='utf-8') as f: json.dump(results, f, ensure_ascii=False, indent=2)
+            print(f"已写入: {path}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f: baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{regressions} 项超过基线 {args.threshold:.0%} 以上。")
+            sys.exit(1)
+        print("\n未发现退化。")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+"""
+基准测试用的合成工作簿生成器。
+
+按给定的规模与特征生成 .xlsx 文件: 行列数、稀疏度、中日韩文本比例、公式密度 (含数组公式与共享公式)、
+批注与超链接、合并区域、条件格式以及工作表数量。相同的参数与随机种子总是生成相同的文件
+(文档属性中的时间与压缩包内的时间戳都固定), 便于在不同提交之间比较。
+
+共享公式由 openpyxl 无法直接写出, 保存后改写工作表 XML: 每个共享公式列的第一个单元格写出带 ref 的主公式,
+其余单元格只引用其编号, 与 Excel 下拉填充后保存的结构相同。
+
+用法: python benchmarks/generate_workbook.py OUTPUT.xlsx [--rows N] [--cols N] [--sheets N] ...
+"""
+import argparse
+import datetime
+import random
+import re
+import zipfile
+
+import openpyxl
+from openpyxl.comments import Comment
+from openpyxl.formatting.rule import CellIsRule, FormulaRule
+from openpyxl.styles import PatternFill
+from openpyxl.utils import get_column_letter
+from openpyxl.worksheet.formula import ArrayFormula
+
+DEFAULT_SPEC = {
+    'rows': 2000,
+    'cols': 10,
+    'sheets': 1,
+    'sparsity': 0.0,               # 单元格为空的概率
+    'cjk_ratio': 0.3,              # 文本单元格中中日韩文本的比例
+    'formula_density': 0.1,        # 普通单元格写为公式的概率
+    'shared_formula_cols': 1,      # 每个工作表中整列为共享公式的列数 (位于最右侧)
+    'array_formulas': 5,           # 每个工作表中的数组公式个数
+    'comment_density': 0.01,
+    'hyperlink_density': 0.01,
+    'merged_ranges': 20,           # 每个工作表中的合并区域个数
+    'conditional_formats': 3,      # 每个工作表中的条件格式规则个数
+    'seed': 0,
+}
+
+FIXED_TIMESTAMP = datetime.datetime(2000, 1, 1)
+ASCII_CHARS = "abcdefghijklmnopqrstuvwxyz ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-_"
+CJK_CHARS = [chr(cp) for cp in range(0x4e00, 0x4e00 + 3000)] + [chr(cp) for cp in range(0x3041, 0x3097)] + [chr(cp) for cp in range(0xac00, 0xac00 + 500)]
+# 公式模板, 引用同一行左侧的列, 下拉填充后规范形式相同
+FORMULA_TEMPLATES = [
+    "=A{r}*2",
+    "=SUM(A{r}:C{r})",
+    '=IF(B{r}>500,"高","低")',
+    "=VLOOKUP(A{r},$A$1:$C$100,2,FALSE)",
+    "=ROUND(B{r}/3,2)&\"件\"",
+]
+SHARED_FORMULA_TEMPLATE = "A{r}+B{r}*2"
+ARRAY_FORMULA_TEMPLATE = "=A{r1}:A{r2}*B{r1}:B{r2}"
+
+def _random_text(rng, cjk_ratio):
+    if rng.random() < cjk_ratio: return "".join(rng.choices(CJK_CHARS, k=rng.randint(1, 12)))
+    return "".join(rng.choices(ASCII_CHARS, k=rng.randint(1, 20)))
+
+def _random_value(rng, cjk_ratio):
+    kind = rng.random()
+    if kind < 0.45: return rng.randint(0, 1000) if rng.random() < 0.5 else round(rng.uniform(0, 1e6), 2)
+    if kind < 0.9: return _random_text(rng, cjk_ratio)
+    if kind < 0.95: return FIXED_TIMESTAMP + datetime.timedelta(days=rng.randint(0, 10000))
+    return rng.random() < 0.5
+
+def _fill_sheet(ws, spec, rng):
+    rows, cols = spec['rows'], spec['cols']
+    shared_cols = min(spec['shared_formula_cols'], max(cols - 3, 0))
+    plain_cols = cols - shared_cols
+    ws.append([f"列{c}" if c % 2 else f"Column {c}" for c in range(1, cols + 1)])
+    for r in range(2, rows + 1):
+        row = []
+        for c in range(1, plain_cols + 1):
+            if rng.random() < spec['sparsity']:
+                row.append(None)
+            elif c > 3 and rng.random() < spec['formula_density']:
+                row.append(rng.choice(FORMULA_TEMPLATES).format(r=r))
+            else:
+                row.append(_random_value(rng, spec['cjk_ratio']))
+        # 共享公式列先写普通公式, 保存后再改写为共享公式
+        row.extend("=" + SHARED_FORMULA_TEMPLATE.format(r=r) for _ in range(shared_cols))
+        ws.append(row)
+
+    for i in range(spec['array_formulas']):
+        r1 = rng.randint(2, max(rows - 3, 2))
+        r2 = min(r1 + 2, rows)
+        col = get_column_letter(plain_cols)
+        ws[f"{col}{r1}"] = ArrayFormula(f"{col}{r1}:{col}{r2}", ARRAY_FORMULA_TEMPLATE.format(r1=r1, r2=r2))
+        for r in range(r1 + 1, r2 + 1): ws[f"{col}{r}"] = None
+
+    for r in range(2, rows + 1):
+        for c in range(1, plain_cols + 1):
+            if rng.random() < spec['comment_density']:
+                ws.cell(row=r, column=c).comment = Comment(_random_text(rng, spec['cjk_ratio']), "bench")
+            if rng.random() < spec['hyperlink_density']:
+                ws.cell(row=r, column=c).hyperlink = f"https://example.com/{r}/{c}"
+
+    # 合并区域互不重叠, 也不覆盖数组公式所在的列: 逐个随机放置, 与已放置的区域相交时跳过
+    occupied = set()
+    placed = attempts = 0
+    while placed < spec['merged_ranges'] and attempts < spec['merged_ranges'] * 20 and rows > 3 and plain_cols > 2:
+        attempts += 1
+        r1, c1 = rng.randint(2, rows - 1), rng.randint(1, plain_cols - 2)
+        r2, c2 = min(r1 + rng.randint(0, 3), rows), min(c1 + rng.randint(1, 2), plain_cols - 1)
+        cells = {(r, c) for r in range(r1, r2 + 1) for c in range(c1, c2 + 1)}
+        if cells & occupied: continue
+        occupied |= cells
+        ws.merge_cells(start_row=r1, start_column=c1, end_row=r2, end_column=c2)
+        placed += 1
+
+    fill = PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid")
+    for i in range(spec['conditional_formats']):
+        col = get_column_letter(1 + i % cols)
+        target = f"{col}2:{col}{rows}"
+        if i % 2: ws.conditional_formatting.add(target, FormulaRule(formula=[f"{col}2>{rng.randint(1, 900)}"], fill=fill))
+        else: ws.conditional_formatting.add(target, CellIsRule(operator='greaterThan', formula=[str(rng.randint(1, 900))], fill=fill))
+    return plain_cols, shared_cols
+
+_FORMULA_CELL_RE = re.compile(r'<c r="([A-Z]+)(\d+)"([^>]*)><f>([^<]*)</f>')
+
+def _share_formulas(xml, shared_columns, first_row, last_row):
+    """把 shared_columns 中各列的普通公式改写为共享公式。"""
+    si = {col: i for i, col in enumerate(shared_columns)}
+    def replace(match):
+        col, row, attrs, text = match.groups()
+        if col not in si: return match.group(0)
+        if int(row) == first_row:
+            return f'<c r="{col}{row}"{attrs}><f t="shared" ref="{col}{first_row}:{col}{last_row}" si="{si[col]}">{text}</f>'
+        return f'<c r="{col}{row}"{attrs}><f t="shared" si="{si[col]}" />'
+    return _FORMULA_CELL_RE.sub(replace, xml)
+
+def generate_workbook(path, **spec):
+    """按 spec (未给出的项取 DEFAULT_SPEC 中的值) 生成工作簿并保存到 path, 返回生效的 spec。"""
+    unknown = set(spec) - set(DEFAULT_SPEC)
+    if unknown: raise ValueError(f"未知的生成参数: {', '.join(sorted(unknown))}")
+    spec = {**DEFAULT_SPEC, **spec}
+    rng = random.Random(spec['seed'])
+    wb = openpyxl.Workbook()
+    wb.remove(wb.active)
+    layouts = []
+    for i in range(spec['sheets']):
+        ws = wb.create_sheet(f"数据{i + 1}" if i % 2 == 0 else f"Sheet{i + 1}")
+        layouts.append(_fill_sheet(ws, spec, rng))
+    if spec['sheets'] > 0:
+        wb.defined_names["BenchRange"] = openpyxl.workbook.defined_name.DefinedName("BenchRange", attr_text=f"'{wb.sheetnames[0]}'!$A$2:$C$10")
+    wb.properties.creator = "bench"
+    wb.save(path)
+    _finalize(path, layouts, spec['rows'])
+    return spec
+
+def _finalize(path, layouts, rows):
+    """改写共享公式, 并固定文档属性中的时间与压缩包内的时间戳, 使输出只取决于参数。"""
+    with zipfile.ZipFile(path) as src:
+        entries = [(info, src.read(info.filename)) for info in src.infolist()]
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as dst:
+        for info, data in entries:
+            name = info.filename
+            match = re.fullmatch(r'xl/worksheets/sheet(\d+)\.xml', name)
+            if match and rows > 1:
+                plain_cols, shared_cols = layouts[int(match.group(1)) - 1]
+                shared_columns = [get_column_letter(c) for c in range(plain_cols + 1, plain_cols + shared_cols + 1)]
+                data = _share_formulas(data.decode('utf-8'), shared_columns, 2, rows).encode('utf-8')
+            elif name == 'docProps/core.xml':
+                stamp = FIXED_TIMESTAMP.strftime('%Y-%m-%dT%H:%M:%SZ')
+                data = re.sub(rb'(<dcterms:(?:created|modified)[^>]*>)[^<]*', rb'\g<1>' + stamp.encode('ascii'), data)
+            dst.writestr(zipfile.ZipInfo(name, date_time=FIXED_TIMESTAMP.timetuple()[:6]), data, zipfile.ZIP_DEFLATED)
+
+def main():
+    parser = argparse.ArgumentParser(description="生成基准测试用的合成 .xlsx 工作簿。")
+    parser.add_argument('output', help="输出的 .xlsx 文件路径")
+    for key, value in DEFAULT_SPEC.items():
+        parser.add_argument(f"--{key.replace('_', '-')}", type=type(value), default=value, help=f"默认 {value}")
+    args = vars(parser.parse_args())
+    output = args.pop('output')
+    generate_workbook(output, **args)
+    print(f"已生成: {output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,258 @@
+"""
+单个工作表的紧凑单元格存储。
+
+导出时每个单元格只记录几个整数: 行号、列号、值编号与显示文本编号, 存放在 array 中;
+值、显示文本和注释文本放在各自的驻留表里, 重复出现的内容只保存一份。公式、批注、超链接作为
+稀疏的平行列, 只为带有这些注释的单元格记录 (单元格序号, 文本编号), 引用标记的编号即其在列中的顺序。
+公式列记录的是公式组编号: 规范化后相同的公式共用一组与一个引用标记 (见 formula_groups)。
+
+可视化表格、CSV、归档与图例都从这里按行读取, 不再构建二维表格或逐单元格的字典。
+"""
+from array import array
+from bisect import bisect_left
+
+from openpyxl.utils import get_column_letter
+
+from display_width import get_display_width
+from formula_groups import compress_ranges, normalize_formula, r1c1_formula, render_formula
+
+class InternTable:
+    """把重复出现的对象映射为整数编号; 类型相同且相等的对象共用一个编号 (1、1.0 与 True 互不混淆)。"""
+
+    def __init__(self, *initial):
+        self.items = []
+        self._ids = {}
+        for item in initial: self.add(item)
+
+    def add(self, item):
+        key = (item.__class__, item)
+        item_id = self._ids.get(key)
+        if item_id is None:
+            item_id = self._ids[key] = len(self.items)
+            self.items.append(item)
+        return item_id
+
+    def __getitem__(self, item_id):
+        return self.items[item_id]
+
+    def __len__(self):
+        return len(self.items)
+
+class AnnotationColumn:
+    """一类单元格注释 (批注或超链接) 的稀疏列: 按单元格顺序记录单元格序号与文本编号。"""
+
+    def __init__(self, prefix, strings):
+        self.prefix = prefix
+        self.strings = strings
+        self.positions = array('I')
+        self.text_ids = array('I')
+
+    def append(self, position, text):
+        """记录一条注释, 返回它的引用标记。"""
+        self.positions.append(position)
+        self.text_ids.append(self.strings.add(text))
+        return f"[{self.prefix}{len(self.positions)}]"
+
+    def __len__(self):
+        return len(self.positions)
+
+    def text_at(self, i):
+        return self.strings[self.text_ids[i]]
+
+    def texts(self):
+        """按列中顺序产出每条注释的文本。"""
+        return map(self.strings.items.__getitem__, self.text_ids)
+
+    def legend_items(self):
+        """按编号顺序产出 (引用标记, 文本), 供图例使用。"""
+        strings = self.strings.items
+        for number, text_id in enumerate(self.text_ids, start=1):
+            yield f"[{self.prefix}{number}]", strings[text_id]
+
+class FormulaColumn:
+    """
+    公式的稀疏列: 按单元格顺序记录单元格序号与公式组编号, 引用标记的编号即组编号。
+    grouped 为 True 时规范化后相同的公式 (如整列下拉填充) 归为一组, 单元格自身的 A1 公式文本按位置由组还原;
+    为 False 时每个公式自成一组, 与逐单元格编号等价。rows/cols 为所属存储的行号、列号数组。
+    """
+
+    def __init__(self, prefix, rows, cols, grouped=True):
+        self.prefix = prefix
+        self.grouped = grouped
+        self.rows = rows
+        self.cols = cols
+        self.positions = array('I')
+        self.group_ids = array('I')
+        self.groups = []
+        self._group_ids = {}
+        self._group_ranges = None
+
+    def append(self, position, r_idx, c_idx, formula):
+        """记录位于 (r_idx, c_idx) 的公式, 返回其所属组的引用标记。"""
+        if self.grouped:
+            parts = normalize_formula(formula, r_idx, c_idx)
+            group_id = self._group_ids.get(parts)
+            if group_id is None:
+                group_id = self._group_ids[parts] = len(self.groups)
+                self.groups.append(parts)
+        else:
+            group_id = len(self.groups)
+            self.groups.append((formula,))
+        self.positions.append(position)
+        self.group_ids.append(group_id)
+        self._group_ranges = None
+        return f"[{self.prefix}{group_id + 1}]"
+
+    def __len__(self):
+        return len(self.groups)
+
+    def text_at(self, i):
+        position = self.positions[i]
+        return render_formula(self.groups[self.group_ids[i]], self.rows[position], self.cols[position])
+
+    def texts(self):
+        """按列中顺序产出每个单元格的 A1 公式文本。"""
+        groups, rows, cols = self.groups, self.rows, self.cols
+        for position, group_id in zip(self.positions, self.group_ids):
+            yield render_formula(groups[group_id], rows[position], cols[position])
+
+    def _ranges(self):
+        """每组的 (首个单元格的公式文本, 覆盖的 A1 区域列表)。"""
+        if self._group_ranges is None:
+            members = [[] for _ in self.groups]
+            rows, cols = self.rows, self.cols
+            for position, group_id in zip(self.positions, self.group_ids):
+                members[group_id].append((rows[position], cols[position]))
+            self._group_ranges = [(render_formula(parts, *cells[0]), compress_ranges(cells))
+                                  for parts, cells in zip(self.groups, members)]
+        return self._group_ranges
+
+    def legend_items(self):
+        """按编号顺序产出 (引用标记, 公式文本, 覆盖区域列表), 供图例使用。公式文本取组内第一个单元格的公式。"""
+        for number, (formula, ranges) in enumerate(self._ranges(), start=1):
+            yield f"[{self.prefix}{number}]", formula, ranges
+
+    def archive_groups(self):
+        """归档中的 formula_groups 部分: 每组的引用标记、首个公式、R1C1 形式与覆盖区域。"""
+        return [{'tag': f"[{self.prefix}{number}]", 'formula': formula, 'r1c1': r1c1_formula(parts), 'ranges': ranges}
+                for number, (parts, (formula, ranges)) in enumerate(zip(self.groups, self._ranges()), start=1)]
+
+class SheetCellStore:
+    """
+    单个工作表的单元格存储。单元格须按行优先顺序加入 (与读取后端产出的顺序一致)。
+    values 编号 0 固定为 None, texts 编号 0 固定为空字符串, 因此表格中的空位可直接以 0 表示。
+    """
+
+    def __init__(self, reference_ids):
+        self.values = InternTable(None)
+        self.texts = InternTable("")
+        self.strings = InternTable()
+        self.rows = array('I')
+        self.cols = array('I')
+        self.value_ids = array('I')
+        self.text_ids = array('I')
+        self.formulas = FormulaColumn(reference_ids['formula_prefix'], self.rows, self.cols, reference_ids['group_formulas'])
+        self.comments = AnnotationColumn(reference_ids['comment_prefix'], self.strings)
+        self.hyperlinks = AnnotationColumn(reference_ids['hyperlink_prefix'], self.strings)
+        # 数据边界: 非空单元格 (有可见内容、注释或公式) 所在的行列范围
+        self.min_r = self.max_r = self.min_c = self.max_c = None
+        self._text_widths = None
+
+    def add(self, r_idx, c_idx, value, is_formula, formula, comment, hyperlink):
+        """
+        加入一个单元格, 返回其序号; 既无值也无注释的单元格与缺失的单元格等价, 不会存储并返回 None。
+        formula 为要记录的公式文本 (没有则为 None), comment/hyperlink 为 openpyxl 的 Comment/Hyperlink 对象。
+        """
+        val = value if value is not None else ""
+        if str(val).strip() != "" or comment or hyperlink or is_formula:
+            if self.min_r is None:
+                self.min_r = self.max_r = r_idx
+                self.min_c = self.max_c = c_idx
+            else:
+                self.max_r = r_idx
+                if c_idx < self.min_c: self.min_c = c_idx
+                if c_idx > self.max_c: self.max_c = c_idx
+        if value is None and formula is None and not comment and not hyperlink:
+            return None
+
+        position = len(self.rows)
+        tags = ""
+        if formula is not None: tags += self.formulas.append(position, r_idx, c_idx, formula)
+        if comment: tags += self.comments.append(position, comment.text)
+        if hyperlink: tags += self.hyperlinks.append(position, hyperlink.target)
+        self.rows.append(r_idx)
+        self.cols.append(c_idx)
+        self.value_ids.append(self.values.add(value))
+        self.text_ids.append(self.texts.add(f"{val}{tags}"))
+        return position
+
+    def is_empty(self):
+        return self.min_r is None
+
+    @property
+    def data_boundary(self):
+        return f"{get_column_letter(self.min_c)}{self.min_r}:{get_column_letter(self.max_c)}{self.max_r}"
+
+    def archive_cell(self, position):
+        """返回单元格的归档数据 (只包含存在的 value/formula/comment/hyperlink 键)。"""
+        cell = {}
+        value_id = self.value_ids[position]
+        if value_id: cell['value'] = self.values[value_id]
+        for key, column in (('formula', self.formulas), ('comment', self.comments), ('hyperlink', self.hyperlinks)):
+            i = _find(column.positions, position)
+            if i is not None: cell[key] = column.text_at(i)
+        return cell
+
+    def iter_archive_cells(self):
+        """按行优先顺序产出数据边界内每个单元格的 (坐标, 归档数据)。"""
+        for _, _, coordinate, cell in self.iter_archive_rows():
+            yield coordinate, cell
+
+    def iter_archive_rows(self):
+        """按行优先顺序产出数据边界内每个单元格的 (行号, 列号, 坐标, 归档数据)。"""
+        values = self.values.items
+        min_r, max_r, min_c, max_c = self.min_r, self.max_r, self.min_c, self.max_c
+        # 三个稀疏列各维护一个游标, 与单元格序号同步前进
+        annotations = [(key, iter(zip(column.positions, column.texts()))) for key, column in
+                       (('formula', self.formulas), ('comment', self.comments), ('hyperlink', self.hyperlinks))]
+        pending = [next(it, (None, None)) for _, it in annotations]
+        for position, (r_idx, c_idx, value_id) in enumerate(zip(self.rows, self.cols, self.value_ids)):
+            cell = {'value': values[value_id]} if value_id else {}
+            for k in range(3):
+                if pending[k][0] == position:
+                    key, it = annotations[k]
+                    cell[key] = pending[k][1]
+                    pending[k] = next(it, (None, None))
+            if min_r <= r_idx <= max_r and min_c <= c_idx <= max_c:
+                yield r_idx, c_idx, f"{get_column_letter(c_idx)}{r_idx}", cell
+
+    def dense_rows(self, ids, min_r=None, max_r=None):
+        """
+        按行产出数据边界内的二维表格, 每行为以 min_c 为起点的编号列表, 空位为 0。
+        ids 为 value_ids (值编号) 或 text_ids (显示文本编号)。一次只展开一行。
+        min_r/max_r 只产出数据边界内的一段行, 用于按行拆分输出。
+        """
+        rows, cols = self.rows, self.cols
+        min_c, max_c = self.min_c, self.max_c
+        min_r = self.min_r if min_r is None else min_r
+        max_r = self.max_r if max_r is None else max_r
+        width = max_c - min_c + 1
+        position, count = bisect_left(rows, min_r), len(rows)
+        for r_idx in range(min_r, max_r + 1):
+            row = [0] * width
+            while position < count and rows[position] == r_idx:
+                c_idx = cols[position]
+                if min_c <= c_idx <= max_c: row[c_idx - min_c] = ids[position]
+                position += 1
+            yield r_idx, row
+
+    def text_widths(self):
+        """每个显示文本的显示宽度, 与 texts 编号对应; 每个不同的文本只计算一次。须在所有单元格加入之后调用。"""
+        if self._text_widths is None:
+            self._text_widths = array('I', map(get_display_width, self.texts.items))
+        return self._text_widths
+
+def _find(positions, position):
+    """在升序的单元格序号列中查找序号, 返回其下标或 None。"""
+    i = bisect_left(positions, position)
+    return i if i < len(positions) and positions[i] == position else None
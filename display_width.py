@@ -0,0 +1,81 @@
+"""
+字符串显示宽度计算, 用于 txt 可视化文件的列对齐。
+
+按 Unicode East Asian Width 属性, 宽 (W) 与全角 (F) 字符占 2 列, 其余字符占 1 列。
+宽字符区间表 WIDE_RANGES 预先生成, 运行时不依赖 unicodedata; 升级 Unicode 版本后
+运行 `python display_width.py` 即可重新生成本文件中的区间表。
+"""
+import re
+
+# East Asian Width 为 W 或 F 的码位闭区间, 由 Unicode 14.0.0 生成。
+# 夹在两个宽字符之间的未分配码位并入区间以减少区间数量; CJK 表意文字区块中的未分配码位按标准默认视为宽字符。
+WIDE_RANGES = (
+    (0x1100, 0x115F), (0x231A, 0x231B), (0x2329, 0x232A), (0x23E9, 0x23EC), (0x23F0, 0x23F0),
+    (0x23F3, 0x23F3), (0x25FD, 0x25FE), (0x2614, 0x2615), (0x2648, 0x2653), (0x267F, 0x267F),
+    (0x2693, 0x2693), (0x26A1, 0x26A1), (0x26AA, 0x26AB), (0x26BD, 0x26BE), (0x26C4, 0x26C5),
+    (0x26CE, 0x26CE), (0x26D4, 0x26D4), (0x26EA, 0x26EA), (0x26F2, 0x26F3), (0x26F5, 0x26F5),
+    (0x26FA, 0x26FA), (0x26FD, 0x26FD), (0x2705, 0x2705), (0x270A, 0x270B), (0x2728, 0x2728),
+    (0x274C, 0x274C), (0x274E, 0x274E), (0x2753, 0x2755), (0x2757, 0x2757), (0x2795, 0x2797),
+    (0x27B0, 0x27B0), (0x27BF, 0x27BF), (0x2B1B, 0x2B1C), (0x2B50, 0x2B50), (0x2B55, 0x2B55),
+    (0x2E80, 0x303E), (0x3041, 0x3247), (0x3250, 0x4DBF), (0x4E00, 0xA4C6), (0xA960, 0xA97C),
+    (0xAC00, 0xD7A3), (0xF900, 0xFAFF), (0xFE10, 0xFE19), (0xFE30, 0xFE6B), (0xFF01, 0xFF60),
+    (0xFFE0, 0xFFE6), (0x16FE0, 0x1B2FB), (0x1F004, 0x1F004), (0x1F0CF, 0x1F0CF), (0x1F18E, 0x1F18E),
+    (0x1F191, 0x1F19A), (0x1F200, 0x1F320), (0x1F32D, 0x1F335), (0x1F337, 0x1F37C), (0x1F37E, 0x1F393),
+    (0x1F3A0, 0x1F3CA), (0x1F3CF, 0x1F3D3), (0x1F3E0, 0x1F3F0), (0x1F3F4, 0x1F3F4), (0x1F3F8, 0x1F43E),
+    (0x1F440, 0x1F440), (0x1F442, 0x1F4FC), (0x1F4FF, 0x1F53D), (0x1F54B, 0x1F54E), (0x1F550, 0x1F567),
+    (0x1F57A, 0x1F57A), (0x1F595, 0x1F596), (0x1F5A4, 0x1F5A4), (0x1F5FB, 0x1F64F), (0x1F680, 0x1F6C5),
+    (0x1F6CC, 0x1F6CC), (0x1F6D0, 0x1F6D2), (0x1F6D5, 0x1F6DF), (0x1F6EB, 0x1F6EC), (0x1F6F4, 0x1F6FC),
+    (0x1F7E0, 0x1F7F0), (0x1F90C, 0x1F93A), (0x1F93C, 0x1F945), (0x1F947, 0x1F9FF), (0x1FA70, 0x1FAF6),
+    (0x20000, 0x3FFFD),
+)
+# 连续宽字符的片段; 字符串的宽度即字符数加上其中宽字符的个数, 逐字符的判断在正则引擎内完成
+WIDE_RUNS_RE = re.compile("[" + "".join(f"\\U{start:08X}-\\U{end:08X}" for start, end in WIDE_RANGES) + "]+")
+# 未分配码位中按标准默认视为宽字符的区块
+DEFAULT_WIDE_BLOCKS = ((0x3400, 0x4DBF), (0x4E00, 0x9FFF), (0xF900, 0xFAFF), (0x20000, 0x2FFFD), (0x30000, 0x3FFFD))
+
+def get_display_width(s):
+    """计算字符串的显示宽度，宽字符与全角字符宽度为2，其余字符为1。纯 ASCII 字符串直接返回长度。"""
+    if s is None: return 0
+    text = s if type(s) is str else str(s)
+    if text.isascii(): return len(text)
+    return len(text) + sum(map(len, WIDE_RUNS_RE.findall(text)))
+
+def build_wide_ranges():
+    """由当前 Python 自带的 unicodedata 生成宽字符区间表, 返回 (Unicode 版本, 区间列表)。"""
+    import unicodedata
+    ranges, start, last = [], None, None
+    for cp in range(0x110000):
+        char = chr(cp)
+        if unicodedata.category(char) == 'Cn':
+            # CPython 对未分配码位的 east_asian_width 返回 'F', 因此未分配码位单独处理:
+            # 默认宽区块内的视为宽字符, 其余不打断也不开启区间
+            if not any(lo <= cp <= hi for lo, hi in DEFAULT_WIDE_BLOCKS): continue
+            wide = True
+        else:
+            wide = unicodedata.east_asian_width(char) in ('W', 'F')
+        if wide:
+            if start is None: start = cp
+            last = cp
+        elif start is not None:
+            ranges.append((start, last))
+            start = None
+    if start is not None: ranges.append((start, last))
+    return unicodedata.unidata_version, ranges
+
+def format_wide_ranges(version, ranges):
+    """区间表的源码文本, 与本文件中的写法完全一致。"""
+    lines = [f"# East Asian Width 为 W 或 F 的码位闭区间, 由 Unicode {version} 生成。",
+             "# 夹在两个宽字符之间的未分配码位并入区间以减少区间数量; CJK 表意文字区块中的未分配码位按标准默认视为宽字符。",
+             "WIDE_RANGES = ("]
+    for i in range(0, len(ranges), 5):
+        lines.append("    " + ", ".join(f"(0x{start:04X}, 0x{end:04X})" for start, end in ranges[i:i + 5]) + ",")
+    lines.append(")")
+    return "\n".join(lines) + "\n"
+
+if __name__ == "__main__":
+    # 用新生成的区间表替换本文件中从说明注释到 WIDE_RANGES 结束的部分
+    with open(__file__, 'r', encoding='utf-8') as f: source = f.read()
+    start = source.index("# East Asian Width 为 W 或 F")
+    end = source.index("\n)\n", start) + 3
+    with open(__file__, 'w', encoding='utf-8') as f: f.write(source[:start] + format_wide_ranges(*build_wide_ranges()) + source[end:])
+    print(f"已更新: {__file__}")
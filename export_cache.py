@@ -0,0 +1,151 @@
+"""
+导出缓存。
+
+缓存目录中以内容哈希为键保存两类条目:
+- workbooks/<键>.json: 一次完整导出的记录 (各输出文件的大小与修改时间)。键由工作簿文件内容、生效的配置、
+  启用的格式与输出位置决定; 这些都未变化且输出文件完好时, 整个导出直接跳过。
+- sheets/<键>/: 单个工作表的输出片段 (可视化片段、归档条目、jsonl 行与控制台信息), 以及该工作表单独写出的文件
+  (CSV 与按行拆分的可视化文件)。键由工作表指纹
+  (见 xlsx_reader) 与同样的配置信息决定, 只有内容变化的工作表需要重新渲染, 其余直接拼接缓存的片段。
+
+脚本文件本身也计入键中, 升级脚本后旧的缓存自然失效。缓存总大小超过上限时按最近使用时间淘汰最旧的条目。
+"""
+import glob
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+CACHE_VERSION = 2
+HASH_CHUNK_SIZE = 1 << 20
+
+def _hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while (chunk := f.read(HASH_CHUNK_SIZE)): digest.update(chunk)
+    return digest.hexdigest()
+
+def _entry_size(path):
+    if os.path.isfile(path): return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+class ExportCache:
+    """基于内容哈希的导出缓存, 带总大小上限与 LRU 淘汰。"""
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.workbooks_dir = os.path.join(directory, 'workbooks')
+        self.sheets_dir = os.path.join(directory, 'sheets')
+        self._code_digest = None
+
+    def clear(self):
+        """
+        删除所有缓存条目。只删除缓存自己创建的 workbooks/ 与 sheets/ 子目录, 缓存目录被配置为其他已有目录时,
+        其中的其他文件不受影响; 删除后目录为空时才一并删除。
+        """
+        for path in (self.workbooks_dir, self.sheets_dir): shutil.rmtree(path, ignore_errors=True)
+        try:
+            os.rmdir(self.directory)
+        except OSError:
+            pass
+
+    def _context_digest(self, config, output_dir, name_without_ext, engine, output_files):
+        """生效配置、输出位置、启用的格式、读取引擎与脚本代码的哈希。"""
+        if self._code_digest is None:
+            code_files = sorted(glob.glob(os.path.join(os.path.dirname(os.path.realpath(__file__)), '*.py')))
+            self._code_digest = [_hash_file(path) for path in code_files]
+        context = [CACHE_VERSION, self._code_digest, config, os.path.realpath(output_dir), name_without_ext, engine, output_files]
+        return hashlib.sha256(json.dumps(context, sort_keys=True, ensure_ascii=False, default=str).encode('utf-8')).hexdigest()
+
+    def workbook_key(self, file_path, config, output_dir, name_without_ext, engine, output_files):
+        context = self._context_digest(config, output_dir, name_without_ext, engine, output_files)
+        return hashlib.sha256(f"{context}:{_hash_file(file_path)}".encode('ascii')).hexdigest()
+
+    def sheet_key(self, sheet_fingerprint, config, output_dir, name_without_ext, engine, output_files):
+        context = self._context_digest(config, output_dir, name_without_ext, engine, output_files)
+        return hashlib.sha256(f"{context}:{sheet_fingerprint}".encode('ascii')).hexdigest()
+
+    def outputs_unchanged(self, workbook_key):
+        """该键的导出记录存在, 且记录中的输出文件都未被删除或改动时返回 True。"""
+        record_path = os.path.join(self.workbooks_dir, f"{workbook_key}.json")
+        try:
+            with open(record_path, 'r', encoding='utf-8') as f:
+                outputs = json.load(f)['outputs']
+            for path, (size, mtime_ns) in outputs.items():
+                stat = os.stat(path)
+                if stat.st_size != size or stat.st_mtime_ns != mtime_ns: return False
+        except (OSError, ValueError, KeyError):
+            return False
+        os.utime(record_path)
+        return True
+
+    def record_outputs(self, workbook_key, paths):
+        """记录一次完整导出的输出文件状态。"""
+        outputs = {}
+        for path in paths:
+            stat = os.stat(path)
+            outputs[os.path.realpath(path)] = [stat.st_size, stat.st_mtime_ns]
+        os.makedirs(self.workbooks_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.workbooks_dir, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({'outputs': outputs}, f, ensure_ascii=False)
+        os.replace(tmp_path, os.path.join(self.workbooks_dir, f"{workbook_key}.json"))
+
+    def get_sheet(self, sheet_key):
+        """返回缓存的工作表片段目录, 未命中时返回 None。"""
+        entry_dir = os.path.join(self.sheets_dir, sheet_key)
+        if not os.path.isfile(os.path.join(entry_dir, 'log')): return None
+        os.utime(entry_dir)
+        return entry_dir
+
+    def put_sheet(self, sheet_key, fragment_files, sheet_files, log):
+        """
+        将工作表片段移入缓存 (fragment_files 为 {格式: 片段文件}), 并复制该工作表单独写出的文件
+        (sheet_files 为 [(格式, 路径), ...])。条目先在临时目录中写完再整体改名, 并发的进程不会读到写了一半的条目。
+        """
+        os.makedirs(self.sheets_dir, exist_ok=True)
+        staging_dir = tempfile.mkdtemp(dir=self.sheets_dir, prefix='.tmp-')
+        for fmt, path in fragment_files.items(): shutil.move(path, os.path.join(staging_dir, fmt))
+        os.makedirs(os.path.join(staging_dir, 'files'))
+        for _, path in sheet_files: shutil.copyfile(path, os.path.join(staging_dir, 'files', os.path.basename(path)))
+        with open(os.path.join(staging_dir, 'files.json'), 'w', encoding='utf-8') as f:
+            json.dump([[fmt, os.path.basename(path)] for fmt, path in sheet_files], f, ensure_ascii=False)
+        with open(os.path.join(staging_dir, 'log'), 'w', encoding='utf-8') as f: f.write(log)
+        try:
+            os.rename(staging_dir, os.path.join(self.sheets_dir, sheet_key))
+        except OSError:
+            # 其他进程已写入同一条目
+            shutil.rmtree(staging_dir, ignore_errors=True)
+
+    def restore_sheet_files(self, entry_dir, output_dir):
+        """把缓存条目中该工作表单独写出的文件复制回输出目录, 返回 [(格式, 路径), ...]。"""
+        with open(os.path.join(entry_dir, 'files.json'), 'r', encoding='utf-8') as f: manifest = json.load(f)
+        sheet_files = []
+        for fmt, name in manifest:
+            path = os.path.join(output_dir, name)
+            shutil.copyfile(os.path.join(entry_dir, 'files', name), path)
+            sheet_files.append((fmt, path))
+        return sheet_files
+
+    def evict(self):
+        """缓存总大小超过上限时, 按最近使用时间从旧到新删除条目。"""
+        entries = []
+        for parent in (self.workbooks_dir, self.sheets_dir):
+            if not os.path.isdir(parent): continue
+            for name in os.listdir(parent):
+                if name.startswith('.tmp'): continue
+                path = os.path.join(parent, name)
+                try:
+                    entries.append((os.path.getmtime(path), _entry_size(path), path))
+                except OSError:
+                    continue
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes: break
+            if os.path.isdir(path): shutil.rmtree(path, ignore_errors=True)
+            else:
+                try: os.remove(path)
+                except OSError: pass
+            total -= size
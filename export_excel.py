@@ -1,26 +1,74 @@
 import sys
 import os
+import argparse
 import re
 import json
-import csv
+import glob
+import io
+import time
+import contextlib
+import atexit
+import functools
+import importlib
+import itertools
+import shutil
+import tempfile
+import textwrap
 
 # --- 1. 依赖库检测 ---
+# 读取工作簿始终需要 openpyxl; 各归档格式专用的库 (toml, pyyaml) 只在启用对应格式时才导入, 见 import_format_library。
 try:
     import openpyxl
     from openpyxl.worksheet.formula import ArrayFormula
     from openpyxl.utils import get_column_letter
-    import toml
-    import yaml
 except ImportError as e:
-    missing_library = e.name
-    print(f"错误: 缺少必要的库 '{missing_library}'。")
-    if missing_library == 'yaml':
-        missing_library = 'pyyaml'
-    print(f"请使用此命令安装: pip install {missing_library}")
+    print(f"错误: 缺少必要的库 '{e.name}'。")
+    print(f"请使用此命令安装: pip install {e.name}")
+    sys.exit(1)
+# 各读取后端用到 openpyxl 3.1 起才有的内部结构与接口 (如 wb._date_formats、按工作表的 defined_names), 更早的版本无法读取工作簿
+OPENPYXL_MIN_VERSION = (3, 1)
+if tuple(int(part) for part in re.findall(r'\d+', openpyxl.__version__)[:2]) < OPENPYXL_MIN_VERSION:
+    print(f"错误: 需要 openpyxl {'.'.join(map(str, OPENPYXL_MIN_VERSION))} 或更高版本, 当前为 {openpyxl.__version__}。")
+    print("请使用此命令升级: pip install -U 'openpyxl>=3.1'")
     sys.exit(1)
 
 import datetime
 
+from xlsx_reader import ENGINES, open_workbook_reader
+from export_cache import ExportCache
+from cell_store import SheetCellStore
+from display_width import get_display_width
+from export_stats import ExportStats, write_report
+from sheet_selection import SelectionError, in_bounds, resolve_selection, shard_row_ranges
+from visual_renderers import RENDERERS, SheetLayout
+
+VISUAL_FORMATS = tuple(RENDERERS)
+ARCHIVE_FORMATS = ('toml', 'json', 'yaml', 'jsonl', 'sqlite')
+WRITE_BUFFER_SIZE = 1 << 20
+# 归档格式专用的第三方库: {模块名: pip 包名}
+FORMAT_LIBRARIES = {'toml': 'toml', 'yaml': 'pyyaml'}
+# 逐单元格写出 json 时, 在工作表的其余部分中占据 cells 位置的标记
+JSON_CELLS_PLACEHOLDER = "\0cells\0"
+JSON_CELLS_CHUNK_SIZE = 1024
+
+class ExportError(Exception):
+    """导出单个工作簿失败 (如文件无法读取) 时抛出, 由调用方决定退出或继续处理其他文件。"""
+
+def import_format_library(name):
+    """导入某个归档格式所需的库, 只在启用该格式时调用; 未安装时抛出带安装提示的 ExportError。"""
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        raise ExportError(f"缺少 {name} 格式所需的库 '{name}', 请使用此命令安装: pip install {FORMAT_LIBRARIES[name]}") from None
+
+def parse_toml(text):
+    """解析 TOML 文本。Python 3.11 起使用标准库 tomllib, 读取配置时无需导入 toml 库。"""
+    try:
+        import tomllib
+    except ImportError:
+        tomllib = import_format_library('toml')
+    return tomllib.loads(text)
+
 def load_config(config_path):
     """加载配置文件，如果文件不存在则创建并使用默认值。"""
     DEFAULT_CONFIG_CONTENT = """
@@ -28,7 +76,7 @@ def load_config(config_path):
 
 # 控制默认生成哪些文件。
 # 将不需要的格式从列表中移除即可禁用。
-# 可用选项: "txt", "md_plain", "md_rich", "toml", "json", "yaml", "csv"
+# 可用选项: "txt", "md_plain", "md_rich", "toml", "json", "yaml", "jsonl", "sqlite", "csv"
 [outputs]
 default_formats = [
     "txt", 
@@ -46,6 +94,35 @@ minify_json = false
 [paths]
 output_directory = "output"
 
+# 并行处理的设置。
+[batch]
+# 批量模式 (输入为多个文件、目录、通配符或清单文件) 的并行工作进程数, 0 表示使用 CPU 核数。可用命令行参数 -j 覆盖。
+max_workers = 0
+# 单个工作簿内按工作表并行导出的进程数, 0 表示使用 CPU 核数, 1 表示顺序导出。可用命令行参数 --sheet-jobs 覆盖。
+# 批量模式下各文件已经并行处理, 此项不生效。
+sheet_workers = 1
+
+# 导出缓存的设置。
+# 工作簿、配置与启用的格式均未变化且输出文件完好时直接跳过导出; 否则只重新渲染内容变化的工作表。
+[cache]
+# 是否启用缓存。未命中缓存时各工作表要按片段导出再拼接, 比直接导出慢, 且缓存占用的空间远大于工作簿,
+# 因此默认关闭, 适合反复导出少量改动的工作簿时开启。可用命令行参数 --no-cache 临时禁用, --clear-cache 清空缓存。
+enabled = false
+# 缓存目录, 相对于脚本所在目录。
+directory = ".cache"
+# 缓存总大小上限 (MB), 超出时淘汰最久未使用的条目。
+max_size_mb = 512
+
+# 导出范围的设置。可用命令行参数 --sheet、--range、--shard-rows 覆盖。
+[selection]
+# 要导出的工作表名称, 可使用通配符 (如 "销售*"); 空列表表示全部工作表。未选中的工作表不会被读取。
+sheets = []
+# 只导出此范围内的单元格: A1 形式的区域 (如 "A1:F200"、"B:D"、"2:500") 或命名区域的名称; 留空表示整个工作表。
+# 命名区域只导出它所引用的工作表。
+range = ""
+# 每个工作表的可视化表格与 CSV 每 N 行拆分为一个文件, 可视化表格各自带有列号表头; 0 表示不拆分。
+shard_rows = 0
+
 # 自定义图例部分的标题。
 [legends]
 named_ranges = "命名区域"
@@ -60,12 +137,15 @@ conditional_formatting = "条件格式"
 formula_prefix = "f"
 comment_prefix = "c"
 hyperlink_prefix = "l"
+# 是否将规范化后相同的公式 (如整列下拉填充的公式) 归为一组, 共用一个引用标记与图例条目, 并在归档中输出 formula_groups。
+# 开启后 [fN] 编号与公式图例的内容会改变, 因此默认关闭。
+group_formulas = false
 """
-    DEFAULTS = toml.loads(DEFAULT_CONFIG_CONTENT)
+    DEFAULTS = parse_toml(DEFAULT_CONFIG_CONTENT)
 
     try:
         with open(config_path, 'r', encoding='utf-8') as f:
-            user_config = toml.load(f)
+            user_config = parse_toml(f.read())
         
         for section, keys in DEFAULTS.items():
             if section in user_config:
@@ -81,327 +161,817 @@ hyperlink_prefix = "l"
             f.write(DEFAULT_CONFIG_CONTENT.strip())
         return DEFAULTS
 
+def apply_selection_overrides(config, sheets=None, range_text=None, shard_rows=None):
+    """用命令行参数 (或服务模式任务中的字段) 覆盖配置中的导出范围设置, 返回新的配置; 为 None 的项保留配置中的值。"""
+    selection = dict(config['selection'])
+    if sheets is not None: selection['sheets'] = list(sheets)
+    if range_text is not None: selection['range'] = range_text
+    if shard_rows is not None: selection['shard_rows'] = shard_rows
+    return {**config, 'selection': selection}
+
+def yaml_archive_dumper(yaml):
+    """
+    yaml 归档使用的 Dumper, 优先使用 libyaml 提供的 C 实现。与纯 Python 实现相比, libyaml 会把 BMP 以外的字符 (如 emoji)
+    与 U+0085 等写为双引号内的转义序列, 解析后的数据相同。
+    单元格存储中相同的值 (如日期) 共用一个对象, 因此关闭锚点与别名, 每处都写出完整的值。
+    """
+    base = getattr(yaml, 'CDumper', yaml.Dumper)
+    return type('ArchiveDumper', (base,), {'ignore_aliases': lambda self, data: True})
+
 def json_default_serializer(obj):
     """为JSON序列化提供自定义的默认转换器。"""
     if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
         return obj.isoformat()
     return str(obj)
 
-def get_display_width(s):
-    """计算字符串的显示宽度，中文字符宽度为2，英文字符为1。"""
-    width = 0
-    if s is None: return 0
-    text = str(s)
-    for char in text:
-        if '\u4e00' <= char <= '\u9fa5' or '\uff00' <= char <= '\uffef':
-            width += 2
-        else:
-            width += 1
-    return width
+@contextlib.contextmanager
+def temp_output(path):
+    """
+    给出与 path 位于同一目录的临时文件路径; 正常结束时用 os.replace 替换到 path, 出错时删除临时文件。
+    导出中途出错时不会留下写了一半的输出文件, 上次导出的文件保持原样。
+    """
+    directory, name = os.path.split(path)
+    temp_path = os.path.join(directory, f".{name}.{os.getpid()}.tmp")
+    try:
+        yield temp_path
+    except BaseException:
+        with contextlib.suppress(OSError): os.remove(temp_path)
+        raise
+    os.replace(temp_path, path)
 
-def get_rule_details(rule, is_markdown=False):
+class VisualWriters:
     """
-    辅助函数，用于从单个 Rule 对象中提取详细信息。
-    is_markdown 参数控制输出格式。
+    可视化输出文件 (txt / md_plain / md_rich) 的写入层。
+    文件在导出开始时打开, 每个工作表的表头、表格行和图例一经生成即写入 (带缓冲), 不在内存中累积整份输出。
+    写入的是临时文件, 成功结束时才替换为输出文件 (见 temp_output)。
     """
-    rule_type = type(rule).__name__
-    details = [f"**类型**: {rule_type}"] if is_markdown else [f"      类型: {rule_type}"]
-    prefix = "" if is_markdown else "      "
-    if hasattr(rule, 'formula') and rule.formula:
-        formula_str = ', '.join(map(str, rule.formula))
-        details.append(f"{prefix}**公式**: `{formula_str}`" if is_markdown else f"{prefix}公式: {formula_str}")
-    if hasattr(rule, 'operator') and rule.operator:
-        details.append(f"{prefix}**运算符**: {rule.operator}" if is_markdown else f"{prefix}运算符: {rule.operator}")
-    if hasattr(rule, 'text') and rule.text:
-        details.append(f"{prefix}**文本内容**: {rule.text}" if is_markdown else f"{prefix}文本内容: {rule.text}")
-    if hasattr(rule, 'dxf') and rule.dxf:
-        if rule.dxf.font and hasattr(rule.dxf.font, 'color') and rule.dxf.font.color:
-            details.append(f"{prefix}**字体颜色**: {rule.dxf.font.color.rgb}" if is_markdown else f"{prefix}字体颜色: {rule.dxf.font.color.rgb}")
-        if rule.dxf.fill and hasattr(rule.dxf.fill, 'start_color') and rule.dxf.fill.start_color:
-            details.append(f"{prefix}**背景填充色**: {rule.dxf.fill.start_color.rgb}" if is_markdown else f"{prefix}背景填充色: {rule.dxf.fill.start_color.rgb}")
-    return "  \n".join(details) if is_markdown else "\n".join(details)
-
-def generate_legends(format_type, config, formulas_map, comments_map, hyperlinks_map, named_ranges_map, conditional_formatting):
-    """根据指定的格式生成所有图例部分的字符串。"""
-    legend_str = ""
-    cfg_legends = config['legends']
-    
-    if named_ranges_map:
-        if format_type == 'md':
-            legend_str += f"\n### {cfg_legends['named_ranges']}\n"
-            for name, dest in sorted(named_ranges_map.items()):
-                legend_str += f"- **`{name}`**: `{dest}`\n"
-        else:
-            legend_str += f"\n--- {cfg_legends['named_ranges']} ---\n"
-            for name, dest in sorted(named_ranges_map.items()):
-                legend_str += f"{name}: {dest}\n"
-
-    if formulas_map or comments_map or hyperlinks_map:
-        if format_type == 'md':
-            legend_str += f"\n### {cfg_legends['reference_list']}\n"
-            if formulas_map:
-                legend_str += f"\n#### {cfg_legends['expressions']}\n"
-                for tag, formula in sorted(formulas_map.items(), key=lambda i: int(i[0][len(config['reference_ids']['formula_prefix'])+1:-1])):
-                    legend_str += f"- **`{tag}`**: `{formula}`\n"
-            if comments_map:
-                legend_str += f"\n#### {cfg_legends['comments']}\n"
-                for tag, text in sorted(comments_map.items(), key=lambda i: int(i[0][len(config['reference_ids']['comment_prefix'])+1:-1])):
-                    legend_str += f"- **`{tag}`**: {text}\n"
-            if hyperlinks_map:
-                legend_str += f"\n#### {cfg_legends['hyperlinks']}\n"
-                for tag, target in sorted(hyperlinks_map.items(), key=lambda i: int(i[0][len(config['reference_ids']['hyperlink_prefix'])+1:-1])):
-                    legend_str += f"- **`{tag}`**: {target}\n"
-        else:
-            legend_str += f"\n--- {cfg_legends['reference_list']} ---\n"
-            if formulas_map:
-                legend_str += f"\n  {cfg_legends['expressions']}:\n"
-                for tag, formula in sorted(formulas_map.items(), key=lambda i: int(i[0][len(config['reference_ids']['formula_prefix'])+1:-1])):
-                    legend_str += f"  {tag}: {formula}\n"
-            if comments_map:
-                legend_str += f"\n  {cfg_legends['comments']}:\n"
-                for tag, text in sorted(comments_map.items(), key=lambda i: int(i[0][len(config['reference_ids']['comment_prefix'])+1:-1])):
-                    legend_str += f"  {tag}: {text}\n"
-            if hyperlinks_map:
-                legend_str += f"\n  {cfg_legends['hyperlinks']}:\n"
-                for tag, target in sorted(hyperlinks_map.items(), key=lambda i: int(i[0][len(config['reference_ids']['hyperlink_prefix'])+1:-1])):
-                    legend_str += f"  {tag}: {target}\n"
-
-    if conditional_formatting:
-        if format_type == 'md':
-            legend_str += f"\n### {cfg_legends['conditional_formatting']}\n"
-            for cf_obj in conditional_formatting:
-                legend_str += f"- **作用范围**: `{cf_obj.sqref}`\n"
-                for i, rule in enumerate(cf_obj.rules):
-                    legend_str += f"  - **规则 #{i + 1}**\n    - {get_rule_details(rule, is_markdown=True)}\n"
-        else:
-            legend_str += f"\n--- {cfg_legends['conditional_formatting']} ---\n"
-            for cf_obj in conditional_formatting:
-                legend_str += f"  - 作用范围: {cf_obj.sqref}\n"
-                for i, rule in enumerate(cf_obj.rules):
-                    legend_str += f"    - 规则 #{i + 1}\n{get_rule_details(rule)}\n"
-    
-    return legend_str
 
-def export_excel_to_text(file_path, config, output_dir, name_without_ext, **output_files):
+    def __init__(self, output_files, announce=True):
+        self.paths = {fmt: output_files[fmt] for fmt in VISUAL_FORMATS if output_files.get(fmt)}
+        self.announce = announce
+        self.files = {}
+
+    def __enter__(self):
+        with contextlib.ExitStack() as stack:
+            for fmt, path in self.paths.items():
+                temp_path = stack.enter_context(temp_output(path))
+                self.files[fmt] = stack.enter_context(open(temp_path, 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE))
+            self._outputs = stack.pop_all()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._outputs.__exit__(exc_type, exc_value, traceback)
+        if exc_type is None and self.announce:
+            for path in self.paths.values(): print(f"已生成: {path}")
+
+    def __contains__(self, fmt):
+        return fmt in self.files
+
+    def __bool__(self):
+        return bool(self.files)
+
+    def write(self, fmt, text):
+        """将文本写入指定格式的文件; 未启用的格式直接忽略。"""
+        f = self.files.get(fmt)
+        if f is not None: f.write(text)
+
+    def append_fragment(self, fragment_files):
+        """将工作进程生成的单个工作表片段追加到各可视化文件。"""
+        for fmt, f in self.files.items():
+            with open(fragment_files[fmt], 'r', encoding='utf-8') as src: shutil.copyfileobj(src, f, WRITE_BUFFER_SIZE)
+
+class ArchiveWriters:
+    """
+    数据归档文件 (toml / json / yaml / jsonl / sqlite) 的写入层。
+    toml/json/yaml 逐个工作表序列化并写入, 输出与一次性序列化整个归档完全相同, 但无需在内存中构建整个归档;
+    jsonl 在遍历单元格时即写出, 每个单元格一行; sqlite 逐个工作表批量插入数据库 (见 sqlite_archive)。
+    fragment 为 True 时只写出单个工作表的条目本身, 不写文件头尾与条目间的分隔符, 供并行导出时由主进程拼接。
+    与 VisualWriters 相同, 成功结束时才把临时文件替换为输出文件。
+    """
+
+    def __init__(self, output_files, config, fragment=False, stats=None):
+        self.paths = {fmt: output_files[fmt] for fmt in ARCHIVE_FORMATS if output_files.get(fmt)}
+        self.json_indent = None if config['outputs']['minify_json'] else 4
+        self.fragment = fragment
+        self.stats = stats or ExportStats(enabled=False)
+        self.files = {}
+        self.database = None
+        self.sheet_count = 0
+        self.toml = import_format_library('toml') if 'toml' in self.paths else None
+        self.yaml = import_format_library('yaml') if 'yaml' in self.paths else None
+        self.yaml_dumper = yaml_archive_dumper(self.yaml) if self.yaml else None
+
+    def __enter__(self):
+        with contextlib.ExitStack() as stack:
+            for fmt, path in self.paths.items():
+                temp_path = stack.enter_context(temp_output(path))
+                if fmt == 'sqlite':
+                    from sqlite_archive import SqliteArchive
+                    self.database = SqliteArchive(temp_path, fragment=self.fragment)
+                    # 出错时不提交, 数据库关闭后临时文件随即删除
+                    stack.push(lambda exc_type, *_: self.database.close(commit=exc_type is None))
+                else: self.files[fmt] = stack.enter_context(open(temp_path, 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE))
+            self._outputs = stack.pop_all()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        with self.stats.phase('finish'):
+            if exc_type is not None:
+                self._outputs.__exit__(exc_type, exc_value, traceback)
+            else:
+                with self._outputs:
+                    if not self.fragment: self._write_footers()
+        if exc_type is None and not self.fragment:
+            for path in self.paths.values(): print(f"已生成: {path}")
+
+    def __contains__(self, fmt):
+        return fmt in self.files or (fmt == 'sqlite' and self.database is not None)
+
+    def write_cell(self, sheet_name, coordinate, cell_archive_data):
+        """向 jsonl 文件写入一个单元格。"""
+        record = {'sheet': sheet_name, 'coord': coordinate}
+        for key in ('value', 'formula', 'comment', 'hyperlink'):
+            record[key] = cell_archive_data.get(key)
+        self.files['jsonl'].write(json.dumps(record, ensure_ascii=False, default=json_default_serializer) + "\n")
+
+    def write_global_names(self, named_ranges):
+        """把工作簿级命名区域写入 sqlite 数据库 (只写一次); 其他格式的命名区域随各工作表写出。"""
+        if self.database is not None and not self.fragment: self.database.write_global_names(named_ranges)
+
+    def write_sheet(self, sheet_data, store=None, merged_ranges=(), local_named_ranges=None):
+        """
+        序列化一个工作表的归档数据并追加到 toml/json/yaml 文件, 同时写入 sqlite 数据库。
+        store 为工作表的单元格存储时, 其中的单元格作为 sheet_data 中 cells 项的内容:
+        json 逐个单元格序列化写出; toml/yaml 需要完整的结构, 仅在启用它们时才临时构建整个字典。
+        merged_ranges 为工作表的合并区域, local_named_ranges 为只属于该工作表的命名区域, 二者只写入 sqlite。
+        """
+        sheet_name = sheet_data['name']
+        if self.database is not None:
+            with self.stats.phase('sqlite', sheet_name):
+                self.database.write_sheet(sheet_data, store.iter_archive_rows() if store is not None else (), merged_ranges, local_named_ranges)
+        cells = store.iter_archive_cells() if store is not None else None
+        self._begin_sheet()
+        if cells is not None and ('toml' in self.files or 'yaml' in self.files):
+            with self.stats.phase('archive_cells', sheet_name):
+                sheet_data = {**sheet_data, 'cells': dict(cells)}
+            cells = None
+        if (f := self.files.get('toml')):
+            with self.stats.phase('toml', sheet_name):
+                f.write(self.toml.dumps({'sheets': [sheet_data]}))
+        if (f := self.files.get('json')):
+            with self.stats.phase('json', sheet_name):
+                if cells is not None:
+                    self._write_json_sheet_with_cells(f, sheet_data, cells)
+                else:
+                    text = json.dumps(sheet_data, ensure_ascii=False, indent=self.json_indent, default=json_default_serializer)
+                    f.write(text if self.json_indent is None else textwrap.indent(text, " " * 8))
+        if (f := self.files.get('yaml')):
+            with self.stats.phase('yaml', sheet_name):
+                self.yaml.dump([sheet_data], f, Dumper=self.yaml_dumper, allow_unicode=True, sort_keys=False)
+
+    def _write_json_sheet_with_cells(self, f, sheet_data, cells):
+        """输出与 json.dumps 整个工作表完全相同的文本, 但 cells 分批序列化, 不构建整个字典。"""
+        sheet_data = {**sheet_data, 'cells': JSON_CELLS_PLACEHOLDER}
+        text = json.dumps(sheet_data, ensure_ascii=False, indent=self.json_indent, default=json_default_serializer)
+        if self.json_indent is not None: text = textwrap.indent(text, " " * 8)
+        head, tail = text.split(json.dumps(JSON_CELLS_PLACEHOLDER))
+        f.write(head)
+        # 每批单元格作为一个小字典序列化, 去掉外层花括号后拼接
+        cells = iter(cells)
+        first = True
+        for chunk in iter(lambda: dict(itertools.islice(cells, JSON_CELLS_CHUNK_SIZE)), {}):
+            chunk_text = json.dumps(chunk, ensure_ascii=False, indent=self.json_indent, default=json_default_serializer)
+            if self.json_indent is None:
+                f.write(("{" if first else ", ") + chunk_text[1:-1])
+            else:
+                # 批内的键缩进一层; 工作表条目整体缩进 8 格, cells 的键位于其下两层
+                shift = " " * (8 + self.json_indent)
+                f.write(("{\n" if first else ",\n") + shift + chunk_text[2:-2].replace("\n", "\n" + shift))
+            first = False
+        if first: f.write("{}")
+        else: f.write("}" if self.json_indent is None else "\n" + " " * (8 + self.json_indent) + "}")
+        f.write(tail)
+
+    def append_fragment(self, fragment_files):
+        """将工作进程生成的单个工作表片段 (含 jsonl 行与 sqlite 片段数据库) 追加到各归档文件。"""
+        self._begin_sheet()
+        for fmt, f in self.files.items():
+            with open(fragment_files[fmt], 'r', encoding='utf-8') as src: shutil.copyfileobj(src, f, WRITE_BUFFER_SIZE)
+        if self.database is not None: self.database.append_fragment(fragment_files['sqlite'])
+
+    def _begin_sheet(self):
+        """写入工作表条目之前的文件头或分隔符。"""
+        if self.fragment: return
+        first = self.sheet_count == 0
+        self.sheet_count += 1
+        if (f := self.files.get('json')):
+            if self.json_indent is None: f.write('{"sheets": [' if first else ", ")
+            else: f.write('{\n    "sheets": [\n' if first else ",\n")
+        if first and (f := self.files.get('yaml')): f.write("sheets:\n")
+
+    def _write_footers(self):
+        if self.sheet_count == 0:
+            if (f := self.files.get('toml')): self.toml.dump({'sheets': []}, f)
+            if (f := self.files.get('json')): json.dump({'sheets': []}, f, indent=self.json_indent)
+            if (f := self.files.get('yaml')): self.yaml.dump({'sheets': []}, f, Dumper=self.yaml_dumper)
+            return
+        if (f := self.files.get('json')):
+            f.write("]}" if self.json_indent is None else "\n    ]\n}")
+
+def export_excel_to_text(file_path, config, output_dir, name_without_ext, engine='xml', sheet_workers=1, cache=None, stats=None, **output_files):
     """
     将Excel文件导出为多种归档和可视化格式的文件。
+    engine 指定读取后端: 'xml' 为单次解析引擎, 'openpyxl-stream' 为 openpyxl 只读流式模式, 'openpyxl' 为兼容性回退。
+    sheet_workers 大于 1 时各工作表在独立进程中并行导出, 结果按原工作表顺序合并, 与顺序导出完全相同。
+    cache 为 ExportCache 时, 工作簿与配置均未变化且输出文件完好则直接跳过; 否则只重新渲染内容变化的工作表。
+    stats 为 ExportStats 时记录各阶段的耗时、单元格数与写出的字节数 (及启用时的峰值内存)。
+    返回 {格式: 输出文件路径}; csv 与按行拆分了的可视化格式为路径列表。因缓存跳过导出时返回 None。
     """
+    stats = stats or ExportStats(enabled=False)
+    if cache is not None:
+        with stats.phase('cache'):
+            workbook_key = cache.workbook_key(file_path, config, output_dir, name_without_ext, engine, output_files)
+            unchanged = cache.outputs_unchanged(workbook_key)
+        if unchanged:
+            print("提示: 工作簿与配置均未变化, 输出文件已是最新, 跳过导出。")
+            stats.workbook_cached = True
+            return
+
     try:
-        wb_formulas = openpyxl.load_workbook(file_path, data_only=False)
-        wb_values = openpyxl.load_workbook(file_path, data_only=True)
+        with stats.phase('open'):
+            reader = open_workbook_reader(file_path, engine)
     except Exception as e:
-        print(f"\n错误：无法读取Excel文件 '{file_path}'。")
-        print(f"详细信息: {e}")
-        sys.exit(1)
-
-    archive_data = {'sheets': []}
-    visual_txt_content = ""
-    visual_md_plain_content = ""
-    visual_md_rich_content = ""
-    
-    cfg_ids = config['reference_ids']
-    sheet_names = wb_formulas.sheetnames
+        raise ExportError(f"无法读取Excel文件 '{file_path}'。\n详细信息: {e}") from e
+    try:
+        selection = resolve_selection(reader, config['selection']['sheets'], config['selection']['range'])
+    except SelectionError as e:
+        raise ExportError(str(e)) from e
+
+    sheet_names = list(selection)
+    sheet_workers = min(sheet_workers, len(sheet_names))
+    if sheet_workers > 1 and reader.engine == 'openpyxl':
+        # 完整加载引擎无法只读取单个工作表, 每个工作进程都要重新加载整个工作簿, 并行没有收益
+        print("提示: openpyxl 完整加载引擎不支持按工作表并行, 将顺序导出。")
+        sheet_workers = 1
     
-    for sheet_idx, sheet_name in enumerate(sheet_names):
-        sheet_formulas = wb_formulas[sheet_name]
-        sheet_values = wb_values[sheet_name]
-        
-        sheet_data_for_archive = {'name': sheet_name, 'named_ranges': {}, 'conditional_formatting': [], 'cells': {}}
-        full_grid_data = []
-        formulas_map, comments_map, hyperlinks_map, named_ranges_map = {}, {}, {}, {}
-        formula_counter, comment_counter, hyperlink_counter = 1, 1, 1
-        non_empty_rows, non_empty_cols = set(), set()
-        
-        for name, dest in wb_formulas.defined_names.items():
-            if dest.localSheetId is None or dest.localSheetId == sheet_idx:
-                named_ranges_map[name] = dest.attr_text
-                
-        for r_idx in range(1, sheet_formulas.max_row + 1):
-            row_data = []
-            for c_idx in range(1, sheet_formulas.max_column + 1):
-                cell_formulas = sheet_formulas.cell(row=r_idx, column=c_idx)
-                cell_values = sheet_values.cell(row=r_idx, column=c_idx)
-                val = cell_values.value if cell_values.value is not None else ""
-                tags = []
-                if str(val).strip() != "" or cell_formulas.comment or cell_formulas.hyperlink or cell_formulas.data_type == 'f':
-                    non_empty_rows.add(r_idx)
-                    non_empty_cols.add(c_idx)
-                
-                if cell_formulas.data_type == 'f':
-                    formula_val = cell_formulas.value
-                    real_formula_to_store = None
-                    if isinstance(formula_val, str) and "__xludf.DUMMYFUNCTION" in formula_val:
-                        if '"COMPUTED_VALUE"' not in formula_val: real_formula_to_store = formula_val
-                    elif isinstance(formula_val, ArrayFormula): real_formula_to_store = formula_val.text
-                    elif isinstance(formula_val, str): real_formula_to_store = formula_val
-                    if real_formula_to_store is not None:
-                        tag = f"[{cfg_ids['formula_prefix']}{formula_counter}]"
-                        formulas_map[tag] = real_formula_to_store
-                        tags.append(tag)
-                        formula_counter += 1
-
-                if cell_formulas.comment:
-                    tag = f"[{cfg_ids['comment_prefix']}{comment_counter}]"
-                    comments_map[tag] = cell_formulas.comment.text
-                    tags.append(tag)
-                    comment_counter += 1
-                
-                if cell_formulas.hyperlink:
-                    tag = f"[{cfg_ids['hyperlink_prefix']}{hyperlink_counter}]"
-                    hyperlinks_map[tag] = cell_formulas.hyperlink.target
-                    tags.append(tag)
-                    hyperlink_counter += 1
-
-                display_text = f"{val}{''.join(tags)}"
-                row_data.append(display_text)
-            full_grid_data.append(row_data)
-
-        sheet_header_txt = f"工作表: {sheet_name}\n" + "-" * 40 + "\n\n"
-        sheet_header_md = f"## 工作表: {sheet_name}\n\n"
-        
-        if not non_empty_rows or not non_empty_cols:
-            if 'txt' in output_files: visual_txt_content += sheet_header_txt + "(此工作表无数据)\n\n"
-            if 'md_plain' in output_files: visual_md_plain_content += sheet_header_md + "*(此工作表无数据)*\n\n"
-            if 'md_rich' in output_files: visual_md_rich_content += sheet_header_md + "*(此工作表无数据)*\n\n"
-            archive_data['sheets'].append({'name': sheet_name, 'data_boundary': 'empty'})
-            continue
-
-        min_r, max_r = min(non_empty_rows), max(non_empty_rows)
-        min_c, max_c = min(non_empty_cols), max(non_empty_cols)
-        
-        sheet_data_for_archive['data_boundary'] = f"{get_column_letter(min_c)}{min_r}:{get_column_letter(max_c)}{max_r}"
-        sheet_data_for_archive['named_ranges'] = named_ranges_map
-
-        for r_idx in range(min_r, max_r + 1):
-            for c_idx in range(min_c, max_c + 1):
-                cell_formulas = sheet_formulas.cell(row=r_idx, column=c_idx)
-                cell_values = sheet_values.cell(row=r_idx, column=c_idx)
-                cell_archive_data = {}
-                val = cell_values.value
-                
-                if isinstance(val, (datetime.datetime, datetime.date, datetime.time)): cell_archive_data['value'] = val
-                elif val is not None: cell_archive_data['value'] = val
-
-                if cell_formulas.data_type == 'f':
-                    formula_val = cell_formulas.value
-                    real_formula_to_store = None
+    with VisualWriters(output_files) as visual, ArchiveWriters(output_files, config, stats=stats) as archive:
+        archive.write_global_names(reader.global_named_ranges())
+        if sheet_workers > 1 or cache is not None:
+            sheet_files = _export_sheets_via_fragments(reader, file_path, selection, config, output_dir, name_without_ext, output_files,
+                                                       visual, archive, sheet_workers, cache, stats)
+        else:
+            sheet_files = []
+            for sheet_name, bounds in selection.items():
+                with stats.sheet(sheet_name):
+                    sheet_files += export_sheet(reader, sheet_name, config, output_dir, name_without_ext, output_files, visual, archive, stats, bounds)
+
+    if cache is not None:
+        with stats.phase('cache'):
+            outputs = [output_files[fmt] for fmt in VISUAL_FORMATS + ARCHIVE_FORMATS if output_files.get(fmt)]
+            outputs += [path for _, path in sheet_files]
+            cache.record_outputs(workbook_key, outputs)
+            cache.evict()
+    output_paths = {fmt: output_files[fmt] for fmt in VISUAL_FORMATS + ARCHIVE_FORMATS if output_files.get(fmt)}
+    for fmt, path in sheet_files:
+        # 按行拆分的可视化文件与主文件同列在该格式下
+        paths = output_paths.setdefault(fmt, [])
+        if isinstance(paths, str): paths = output_paths[fmt] = [paths]
+        paths.append(path)
+    stats.finish(output_paths)
+    return output_paths
+
+def csv_output_path(output_dir, name_without_ext, sheet_name):
+    return os.path.join(output_dir, f"{name_without_ext}_{sheet_name}.csv")
+
+# 按工作表并行导出时, 每个工作进程只打开一次工作簿, 之后的任务只读取各自工作表的部件
+_sheet_worker_reader = None
+
+def _init_sheet_worker(file_path, engine):
+    global _sheet_worker_reader
+    with contextlib.redirect_stdout(io.StringIO()):
+        _sheet_worker_reader = open_workbook_reader(file_path, engine)
+
+def _export_sheet_fragments(reader, sheet_name, bounds, config, output_dir, name_without_ext, fragment_files, stats):
+    """
+    把单个工作表导出为片段文件, 返回 (期间打印的信息, 工作表单独写出的文件), 由调用方按工作表顺序输出。
+    """
+    with contextlib.redirect_stdout(io.StringIO()) as log, stats.sheet(sheet_name):
+        with VisualWriters(fragment_files, announce=False) as visual, ArchiveWriters(fragment_files, config, fragment=True, stats=stats) as archive:
+            sheet_files = export_sheet(reader, sheet_name, config, output_dir, name_without_ext, fragment_files, visual, archive, stats, bounds)
+    return log.getvalue(), sheet_files
+
+def _export_sheet_worker(sheet_name, bounds, config, output_dir, name_without_ext, fragment_files, collect_stats, trace_memory):
+    """在工作进程中导出单个工作表, 返回 (期间打印的信息, 工作表单独写出的文件, 工作进程记录的工作表统计)。"""
+    stats = ExportStats(enabled=collect_stats, trace_memory=trace_memory)
+    log, sheet_files = _export_sheet_fragments(_sheet_worker_reader, sheet_name, bounds, config, output_dir, name_without_ext, fragment_files, stats)
+    return log, sheet_files, stats.sheets
+
+def _sheet_worker_result(future, stats):
+    """取得工作进程的导出结果并并入其工作表统计, 返回 (期间打印的信息, 工作表单独写出的文件)。"""
+    log, sheet_files, worker_sheets = future.result()
+    stats.merge(worker_sheets)
+    return log, sheet_files
+
+def _export_sheets_via_fragments(reader, file_path, selection, config, output_dir, name_without_ext, output_files,
+                                 visual, archive, sheet_workers, cache, stats):
+    """
+    以片段方式导出各工作表: 每个工作表先写入输出目录下临时目录中的片段文件 (或直接取自缓存),
+    再按原工作表顺序追加到输出文件。sheet_workers 大于 1 时需要渲染的工作表交给进程池并行处理。
+    selection 为 {工作表名: 范围}; 返回各工作表单独写出的文件 [(格式, 路径), ...]。
+    """
+    fragment_formats = [fmt for fmt in VISUAL_FORMATS + ARCHIVE_FORMATS if output_files.get(fmt)]
+    if sheet_workers > 1: from concurrent.futures import ProcessPoolExecutor
+    executor = ProcessPoolExecutor(max_workers=sheet_workers, initializer=_init_sheet_worker, initargs=(file_path, reader.engine)) if sheet_workers > 1 else None
+    with tempfile.TemporaryDirectory(prefix=f".{name_without_ext}_sheets_", dir=output_dir) as fragment_dir, \
+         (executor or contextlib.nullcontext()):
+        pending = []
+        for sheet_idx, (sheet_name, bounds) in enumerate(selection.items()):
+            sheet_key = entry_dir = None
+            if cache is not None:
+                with stats.phase('cache'):
+                    if (fingerprint := reader.sheet_fingerprint(sheet_name)) is not None:
+                        sheet_key = cache.sheet_key(fingerprint, config, output_dir, name_without_ext, reader.engine, output_files)
+                        entry_dir = cache.get_sheet(sheet_key)
+            if entry_dir is not None:
+                pending.append((sheet_name, None, {fmt: os.path.join(entry_dir, fmt) for fmt in fragment_formats}, entry_dir, None))
+                continue
+            fragment_files = {fmt: os.path.join(fragment_dir, f"{sheet_idx}.{fmt}") for fmt in fragment_formats}
+            fragment_files['csv'] = output_files.get('csv')
+            if executor is not None:
+                future = executor.submit(_export_sheet_worker, sheet_name, bounds, config, output_dir, name_without_ext, fragment_files,
+                                         stats.enabled, stats.trace_memory)
+                job = functools.partial(_sheet_worker_result, future, stats)
+            else:
+                job = functools.partial(_export_sheet_fragments, reader, sheet_name, bounds, config, output_dir, name_without_ext, fragment_files, stats)
+            pending.append((sheet_name, sheet_key, fragment_files, None, job))
+
+        all_sheet_files = []
+        # pending 中每项为 (工作表名, 缓存键, 片段文件, 缓存命中时的缓存条目目录, 需要渲染时的导出任务)
+        for sheet_name, sheet_key, fragment_files, entry_dir, job in pending:
+            if entry_dir is not None:
+                with open(os.path.join(entry_dir, 'log'), 'r', encoding='utf-8') as f: log = f.read()
+                sheet_files = cache.restore_sheet_files(entry_dir, output_dir)
+                stats.sheet_cached(sheet_name)
+            else:
+                log, sheet_files = job()
+            all_sheet_files += sheet_files
+            sys.stdout.write(log)
+            with stats.phase('merge'):
+                visual.append_fragment(fragment_files)
+                archive.append_fragment(fragment_files)
+            if entry_dir is not None: continue
+            fragments = {fmt: fragment_files[fmt] for fmt in fragment_formats}
+            if sheet_key is not None:
+                with stats.phase('cache'):
+                    cache.put_sheet(sheet_key, fragments, sheet_files, log)
+            else:
+                for path in fragments.values(): os.remove(path)
+    return all_sheet_files
+
+def export_sheet(reader, sheet_name, config, output_dir, name_without_ext, output_files, visual, archive, stats=None, bounds=None):
+    """
+    导出单个工作表: 写入其可视化表格与图例、归档条目和 CSV 文件。各工作表之间互不依赖。
+    bounds 为要导出的范围 (min_col, min_row, max_col, max_row), None 表示整个工作表 (见 sheet_selection)。
+    返回该工作表单独写出的文件 [(格式, 路径), ...]: CSV 与按行拆分的可视化文件。
+    """
+    stats = stats or ExportStats(enabled=False)
+    with stats.phase('open', sheet_name):
+        sheet = reader.open_sheet(sheet_name, bounds)
+
+    sheet_data_for_archive = {'name': sheet_name, 'named_ranges': {}, 'conditional_formatting': []}
+    if config['reference_ids']['group_formulas']: sheet_data_for_archive['formula_groups'] = []
+    sheet_data_for_archive['cells'] = {}
+    store = SheetCellStore(config['reference_ids'])
+    named_ranges_map = reader.named_ranges(sheet_name)
+    write_jsonl = 'jsonl' in archive
+
+    # 按行流式遍历, 只经过实际存在的单元格; 数据边界由遇到的非空单元格确定, 而非工作表声明的尺寸
+    with stats.phase('read', sheet_name):
+        for r_idx, row_cells in sheet.iter_rows():
+            if bounds is not None:
+                # 读过范围的最后一行后不再继续解析工作表
+                if bounds[3] is not None and r_idx > bounds[3]: break
+                row_cells = [(c_idx, cell) for c_idx, cell in row_cells if in_bounds(bounds, r_idx, c_idx)]
+            for c_idx, cell in row_cells:
+                real_formula_to_store = None
+                if cell.data_type == 'f':
+                    formula_val = cell.formula
                     if isinstance(formula_val, str) and "__xludf.DUMMYFUNCTION" in formula_val:
                         if '"COMPUTED_VALUE"' not in formula_val: real_formula_to_store = formula_val
                     elif isinstance(formula_val, ArrayFormula): real_formula_to_store = formula_val.text
                     elif isinstance(formula_val, str): real_formula_to_store = formula_val
-                    if real_formula_to_store is not None: cell_archive_data['formula'] = real_formula_to_store
-
-                if cell_formulas.comment: cell_archive_data['comment'] = cell_formulas.comment.text
-                if cell_formulas.hyperlink: cell_archive_data['hyperlink'] = cell_formulas.hyperlink.target
-                if cell_archive_data: sheet_data_for_archive['cells'][cell_formulas.coordinate] = cell_archive_data
-
-        for cf_obj in sheet_formulas.conditional_formatting:
-            for rule in cf_obj.rules:
-                rule_dict = {'range': str(cf_obj.sqref), 'type': rule.type}
-                if hasattr(rule, 'operator') and rule.operator: rule_dict['operator'] = rule.operator
-                if hasattr(rule, 'formula') and rule.formula: rule_dict['formula'] = [str(f) for f in rule.formula]
-                sheet_data_for_archive['conditional_formatting'].append(rule_dict)
-        archive_data['sheets'].append(sheet_data_for_archive)
-
-        if output_files.get("csv"):
-            csv_filename = os.path.join(output_dir, f"{name_without_ext}_{sheet_name}.csv")
-            with open(csv_filename, 'w', newline='', encoding='utf-8-sig') as csvfile:
-                writer = csv.writer(csvfile)
-                for r_idx_csv in range(min_r, max_r + 1):
-                    row_to_write = [sheet_values.cell(row=r_idx_csv, column=c_idx_csv).value for c_idx_csv in range(min_c, max_c + 1)]
-                    writer.writerow(row_to_write)
-            print(f"已生成: {csv_filename}")
-        
-        if any(f in output_files for f in ["txt", "md_plain", "md_rich"]):
-            merge_info = {}
-            for merged_range in sheet_formulas.merged_cells.ranges:
-                min_col, min_row, max_col, max_row = merged_range.bounds
-                primary_cell = (min_row, min_col)
-                merge_info[primary_cell] = {'primary': True, 'colspan': max_col - min_col + 1, 'rowspan': max_row - min_row + 1}
-                for r in range(min_row, max_row + 1):
-                    for c in range(min_col, max_col + 1):
-                        if (r, c) != primary_cell: merge_info[(r, c)] = {'primary': False}
-
-            col_widths = {c: get_display_width(get_column_letter(c)) for c in range(min_c, max_c + 1)}
-            for r_idx in range(min_r, max_r + 1):
-                for c_idx in range(min_c, max_c + 1):
-                    cell_text = full_grid_data[r_idx - 1][c_idx - 1]
-                    col_widths[c_idx] = max(col_widths.get(c_idx, 0), get_display_width(cell_text))
-            
-            row_header_width = len(str(max_r))
-            headers_txt = [" " * (col_widths.get(c, 0) - len(get_column_letter(c))) + get_column_letter(c) for c in range(min_c, max_c + 1)]
-            visual_txt_content += sheet_header_txt + " " * row_header_width + " | " + " | ".join(headers_txt) + "\n"
-            separator_txt = ["-" * col_widths.get(c, 0) for c in range(min_c, max_c + 1)]
-            visual_txt_content += "-" * row_header_width + "-+-" + "-+-".join(separator_txt) + "\n"
-            for r_idx in range(min_r, max_r + 1):
-                line_data = [full_grid_data[r_idx-1][c_idx-1] + " " * (col_widths.get(c_idx,0) - get_display_width(full_grid_data[r_idx-1][c_idx-1])) for c_idx in range(min_c, max_c + 1)]
-                visual_txt_content += f"{str(r_idx).rjust(row_header_width)} | " + " | ".join(line_data) + "\n"
-
-            headers_md = [""] + [get_column_letter(c) for c in range(min_c, max_c + 1)]
-            visual_md_plain_content += sheet_header_md + "| " + " | ".join(headers_md) + " |\n"
-            visual_md_plain_content += "|:" + "--:|:" + ":|".join(["--"] * (max_c - min_c + 1)) + "|\n"
-            for r_idx in range(min_r, max_r + 1):
-                line_data_md = [f"**{r_idx}**"]
-                for c_idx in range(min_c, max_c + 1):
-                    info = merge_info.get((r_idx, c_idx))
-                    if info and not info['primary']: line_data_md.append("")
-                    else: line_data_md.append(full_grid_data[r_idx - 1][c_idx - 1])
-                visual_md_plain_content += "| " + " | ".join(line_data_md) + " |\n"
-            
-            visual_md_rich_content += sheet_header_md
-            if not sheet_formulas.merged_cells.ranges:
-                visual_md_rich_content += "| " + " | ".join(headers_md) + " |\n"
-                visual_md_rich_content += "|:" + "--:|:" + ":|".join(["--"] * (max_c - min_c + 1)) + "|\n"
-                for r_idx in range(min_r, max_r + 1):
-                    line_data_md = [f"**{r_idx}**"] + [full_grid_data[r_idx-1][c_idx-1] for c_idx in range(min_c, max_c+1)]
-                    visual_md_rich_content += "| " + " | ".join(line_data_md) + " |\n"
-            else:
-                visual_md_rich_content += "<table>\n  <thead>\n    <tr>\n      <th></th>\n"
-                for c in range(min_c, max_c+1): visual_md_rich_content += f"      <th>{get_column_letter(c)}</th>\n"
-                visual_md_rich_content += "    </tr>\n  </thead>\n  <tbody>\n"
-                for r_idx in range(min_r, max_r + 1):
-                    visual_md_rich_content += f"    <tr>\n      <td><b>{r_idx}</b></td>\n"
-                    for c_idx in range(min_c, max_c + 1):
-                        info = merge_info.get((r_idx, c_idx))
-                        if info and info['primary']:
-                            visual_md_rich_content += f'      <td colspan="{info["colspan"]}" rowspan="{info["rowspan"]}">{full_grid_data[r_idx - 1][c_idx - 1]}</td>\n'
-                        elif info and not info['primary']: continue
-                        else: visual_md_rich_content += f"      <td>{full_grid_data[r_idx - 1][c_idx - 1]}</td>\n"
-                    visual_md_rich_content += "    </tr>\n"
-                visual_md_rich_content += "  </tbody>\n</table>\n"
-
-        txt_legend = generate_legends('txt', config, formulas_map, comments_map, hyperlinks_map, named_ranges_map, sheet_formulas.conditional_formatting)
-        md_legend = generate_legends('md', config, formulas_map, comments_map, hyperlinks_map, named_ranges_map, sheet_formulas.conditional_formatting)
-        
-        if 'txt' in output_files: visual_txt_content += txt_legend
-        if 'md_plain' in output_files: visual_md_plain_content += md_legend
-        if 'md_rich' in output_files: visual_md_rich_content += md_legend
-    
-    if (path := output_files.get("toml")):
-        with open(path, 'w', encoding='utf-8') as f: toml.dump(archive_data, f)
-        print(f"已生成: {path}")
-    if (path := output_files.get("json")):
-        indent = None if config['outputs']['minify_json'] else 4
-        with open(path, 'w', encoding='utf-8') as f: json.dump(archive_data, f, ensure_ascii=False, indent=indent, default=json_default_serializer)
-        print(f"已生成: {path}")
-    if (path := output_files.get("yaml")):
-        with open(path, 'w', encoding='utf-8') as f: yaml.dump(archive_data, f, allow_unicode=True, sort_keys=False)
-        print(f"已生成: {path}")
-    if (path := output_files.get("txt")):
-        with open(path, 'w', encoding='utf-8') as f: f.write(visual_txt_content)
-        print(f"已生成: {path}")
-    if (path := output_files.get("md_plain")):
-        with open(path, 'w', encoding='utf-8') as f: f.write(visual_md_plain_content)
-        print(f"已生成: {path}")
-    if (path := output_files.get("md_rich")):
-        with open(path, 'w', encoding='utf-8') as f: f.write(visual_md_rich_content)
-        print(f"已生成: {path}")
+
+                position = store.add(r_idx, c_idx, cell.value, cell.data_type == 'f', real_formula_to_store, cell.comment, cell.hyperlink)
+                if write_jsonl and position is not None:
+                    archive.write_cell(sheet_name, f"{get_column_letter(c_idx)}{r_idx}", store.archive_cell(position))
+    stats.count_cells(sheet_name, len(store.rows))
+
+    if store.is_empty():
+        for fmt in visual.paths: visual.write(fmt, RENDERERS[fmt].empty_sheet(sheet_name))
+        archive.write_sheet({'name': sheet_name, 'data_boundary': 'empty'})
+        return []
+
+    min_r, max_r = store.min_r, store.max_r
+
+    sheet_data_for_archive['data_boundary'] = store.data_boundary
+    sheet_data_for_archive['named_ranges'] = named_ranges_map
+
+    for cf_obj in sheet.conditional_formatting:
+        for rule in cf_obj.rules:
+            rule_dict = {'range': str(cf_obj.sqref), 'type': rule.type}
+            if hasattr(rule, 'operator') and rule.operator: rule_dict['operator'] = rule.operator
+            if hasattr(rule, 'formula') and rule.formula: rule_dict['formula'] = [str(f) for f in rule.formula]
+            sheet_data_for_archive['conditional_formatting'].append(rule_dict)
+    if 'formula_groups' in sheet_data_for_archive: sheet_data_for_archive['formula_groups'] = store.formulas.archive_groups()
+    # 逐单元格的归档数据直接从存储中按行产出, 不随工作表一起保留
+    archive.write_sheet(sheet_data_for_archive, store=store, merged_ranges=sheet.merged_ranges,
+                        local_named_ranges=reader.local_named_ranges(sheet_name))
+
+    shard_rows = config['selection']['shard_rows']
+    parts = shard_row_ranges(min_r, max_r, shard_rows)
+    sharded = len(parts) > 1
+    sheet_files = []
+    if output_files.get("csv"):
+        import csv
+        values = store.values.items
+        with stats.phase('csv', sheet_name):
+            # 拆分后的 CSV 文件只包含各自的行, 依次拼接即为完整的表格
+            for k, (lo, hi) in enumerate(parts, start=1):
+                csv_filename = csv_output_path(output_dir, name_without_ext, f"{sheet_name}_part{k}" if sharded else sheet_name)
+                with temp_output(csv_filename) as temp_path, open(temp_path, 'w', newline='', encoding='utf-8-sig') as csvfile:
+                    writer = csv.writer(csvfile)
+                    for _, row_ids in store.dense_rows(store.value_ids, lo, hi):
+                        writer.writerow([values[i] for i in row_ids])
+                print(f"已生成: {csv_filename}")
+                sheet_files.append(('csv', csv_filename))
+
+    if not visual: return sheet_files
+
+    # 布局只计算一次, 只为启用的可视化格式创建渲染器; 拆分后的各个文件使用相同的布局
+    with stats.phase('layout', sheet_name):
+        cut_max_c = store.max_c if bounds is not None and bounds[2] is not None else float('inf')
+        layout = SheetLayout(sheet_name, store, sheet.merged_ranges, sheet.conditional_formatting, named_ranges_map, config['legends'], cut_max_c)
+        renderers = {fmt: RENDERERS[fmt](layout) for fmt in visual.paths}
+
+    # 按行拆分时每段表格写入单独的文件, 各自带有表头; 主可视化文件中只列出这些文件, 图例仍写在主文件中
+    part_files = [build_output_files(output_dir, f"{name_without_ext}_{sheet_name}_part{k}", visual.paths)
+                  for k in range(1, len(parts) + 1)] if sharded else []
+    if sharded:
+        note = f"共 {max_r - min_r + 1} 行, 已按每 {shard_rows} 行拆分为 {len(parts)} 个文件"
+        for fmt, renderer in renderers.items():
+            visual.write(fmt, renderer.shard_index(note, [os.path.basename(files[fmt]) for files in part_files]))
+
+    # 统计时按格式分别累计渲染耗时, 其余为共用的按行展开 (rows)
+    timings = dict.fromkeys(renderers, 0.0) if stats.enabled else None
+    start = time.perf_counter()
+    for k, (lo, hi) in enumerate(parts, start=1):
+        title = f"{sheet_name} (第 {k}/{len(parts)} 部分, 第 {lo}-{hi} 行)" if sharded else sheet_name
+        with (VisualWriters(part_files[k - 1]) if sharded else contextlib.nullcontext(visual)) as out:
+            render_part(renderers, out, store, title, lo, hi, timings)
+        if sharded: sheet_files += list(part_files[k - 1].items())
+    if timings is not None:
+        stats.add_time('rows', time.perf_counter() - start - sum(timings.values()), sheet_name)
+        for fmt, seconds in timings.items(): stats.add_time(f'render:{fmt}', seconds, sheet_name)
+
+    with stats.phase('legends', sheet_name):
+        for fmt, renderer in renderers.items(): visual.write(fmt, renderer.legends())
+    return sheet_files
+
+def render_part(renderers, out, store, title, lo, hi, timings=None):
+    """
+    渲染一段表格 (第 lo-hi 行) 并写入 out: 各行只遍历一次, 每一行依次交给所有渲染器。
+    timings 为 {格式: 秒} 时累计各渲染器的耗时 (含写出); 为 None 时不计时。
+    """
+    if timings is None:
+        for fmt, renderer in renderers.items(): out.write(fmt, renderer.begin_table(title, lo, hi))
+        for r_idx, row_ids in store.dense_rows(store.text_ids, lo, hi):
+            for fmt, renderer in renderers.items(): out.write(fmt, renderer.row(r_idx, row_ids))
+        for fmt, renderer in renderers.items(): out.write(fmt, renderer.end_table())
+        return
+    clock = time.perf_counter
+    for fmt, renderer in renderers.items():
+        start = clock()
+        out.write(fmt, renderer.begin_table(title, lo, hi))
+        timings[fmt] += clock() - start
+    for r_idx, row_ids in store.dense_rows(store.text_ids, lo, hi):
+        for fmt, renderer in renderers.items():
+            start = clock()
+            out.write(fmt, renderer.row(r_idx, row_ids))
+            timings[fmt] += clock() - start
+    for fmt, renderer in renderers.items():
+        start = clock()
+        out.write(fmt, renderer.end_table())
+        timings[fmt] += clock() - start
+
+def build_output_files(output_dir, name_without_ext, enabled_formats):
+    """根据启用的格式生成 {格式: 输出路径} 映射; csv 为每个工作表单独生成, 仅以 True 标记。"""
+    output_files = {}
+    if 'toml' in enabled_formats: output_files['toml'] = os.path.join(output_dir, f"{name_without_ext}_archive.toml")
+    if 'json' in enabled_formats: output_files['json'] = os.path.join(output_dir, f"{name_without_ext}_archive.json")
+    if 'yaml' in enabled_formats: output_files['yaml'] = os.path.join(output_dir, f"{name_without_ext}_archive.yaml")
+    if 'jsonl' in enabled_formats: output_files['jsonl'] = os.path.join(output_dir, f"{name_without_ext}_cells.jsonl")
+    if 'sqlite' in enabled_formats: output_files['sqlite'] = os.path.join(output_dir, f"{name_without_ext}_archive.sqlite")
+    for fmt, renderer in RENDERERS.items():
+        if fmt in enabled_formats: output_files[fmt] = os.path.join(output_dir, f"{name_without_ext}{renderer.suffix}")
+    if 'csv' in enabled_formats: output_files['csv'] = True
+    return output_files
+
+def collect_input_files(inputs, manifest=None):
+    """
+    将命令行给出的文件、目录 (递归查找 .xlsx) 和通配符, 以及清单文件中的路径展开为去重后的 .xlsx 文件列表。
+    清单文件每行一个路径, 空行和以 # 开头的行会被忽略。
+    """
+    patterns = list(inputs)
+    if manifest:
+        with open(manifest, 'r', encoding='utf-8') as f:
+            patterns += [line.strip() for line in f if line.strip() and not line.lstrip().startswith('#')]
+
+    files, seen = [], set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = sorted(glob.glob(os.path.join(glob.escape(pattern), '**', '*.xlsx'), recursive=True))
+        elif glob.has_magic(pattern):
+            matches = sorted(glob.glob(pattern, recursive=True))
+        else:
+            matches = [pattern]
+        for path in matches:
+            # 跳过 Excel 打开文件时生成的临时锁文件
+            if os.path.basename(path).startswith('~$'): continue
+            key = os.path.realpath(path)
+            if key not in seen:
+                seen.add(key)
+                files.append(path)
+    return files
+
+def assign_output_names(files):
+    """为每个输入文件分配输出文件名前缀; 不同目录下的同名文件依次加上 _2、_3 等后缀以避免互相覆盖。"""
+    names, used = {}, set()
+    for path in files:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        name, n = stem, 1
+        while name.lower() in used:
+            n += 1
+            name = f"{stem}_{n}"
+        used.add(name.lower())
+        names[path] = name
+    return names
+
+def open_export_cache(config, script_dir, disabled=False):
+    """按配置创建导出缓存; 配置或命令行禁用缓存时返回 None。"""
+    cfg_cache = config['cache']
+    if disabled or not cfg_cache['enabled']: return None
+    return ExportCache(os.path.join(script_dir, cfg_cache['directory']), cfg_cache['max_size_mb'] << 20)
+
+def _export_worker(file_path, config, output_dir, name_without_ext, engine, cache, collect_stats=False, trace_memory=False):
+    """
+    批量模式下在工作进程中导出单个文件, 返回 (状态, 耗时, 错误信息, 统计); 单个文件的失败不会影响其他文件。
+    collect_stats 为 False 或导出失败时统计为 None。
+    """
+    start = time.perf_counter()
+    output_files = build_output_files(output_dir, name_without_ext, config['outputs']['default_formats'])
+    stats = ExportStats(enabled=collect_stats, trace_memory=trace_memory)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            export_excel_to_text(file_path=file_path, config=config, output_dir=output_dir,
+                                 name_without_ext=name_without_ext, engine=engine, cache=cache, stats=stats, **output_files)
+    except Exception as e:
+        return 'failed', time.perf_counter() - start, ' '.join(str(e).split('\n')), None
+    return 'ok', time.perf_counter() - start, "", stats.to_dict() if collect_stats else None
+
+def _pad(text, width, right=False):
+    """按显示宽度 (中文等宽字符占 2 列) 用空格补齐到 width 列。"""
+    padding = " " * (width - get_display_width(text))
+    return padding + text if right else text + padding
+
+def run_batch(files, config, output_dir, engine, max_workers, cache=None, collect_stats=False, trace_memory=False):
+    """
+    使用进程池并行导出多个文件, 并打印每个文件的状态与耗时汇总。
+    返回 (失败的文件数量, {路径: 统计}), collect_stats 为 False 时统计为空字典; trace_memory 时统计中包含峰值内存。
+    """
+    names = assign_output_names(files)
+    results = {}
+    total = len(files)
+    start = time.perf_counter()
+    print(f"批量模式: 共 {total} 个文件, {max_workers} 个工作进程")
+
+    def report(path, result):
+        results[path] = result
+        status, elapsed, error, _ = result
+        print(f"[{len(results)}/{total}] {'成功' if status == 'ok' else '失败'} {elapsed:8.2f}s  {path}" + (f"  ({error})" if error else ""))
+
+    if max_workers == 1:
+        for path in files:
+            report(path, _export_worker(path, config, output_dir, names[path], engine, cache, collect_stats, trace_memory))
+    else:
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(_export_worker, path, config, output_dir, names[path], engine, cache, collect_stats, trace_memory): path for path in files}
+            for future in as_completed(futures):
+                path = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # 工作进程异常退出 (如内存不足被终止) 时同样只记为该文件失败
+                    result = ('failed', 0.0, f"工作进程异常: {e}", None)
+                report(path, result)
+
+    failed = [path for path in files if results[path][0] != 'ok']
+    print("\n--- 批量导出汇总 ---")
+    name_width = max([24] + [get_display_width(names[path]) for path in files])
+    print(f"{_pad('状态', 4)}  {_pad('耗时', 9, right=True)}  {_pad('输出名', name_width)}  文件")
+    for path in files:
+        status, elapsed, _, _ = results[path]
+        print(f"{_pad('成功' if status == 'ok' else '失败', 4)}  {elapsed:8.2f}s  {_pad(names[path], name_width)}  {path}")
+    print(f"\n成功 {total - len(failed)} 个, 失败 {len(failed)} 个, 总耗时 {time.perf_counter() - start:.2f}s")
+    if failed:
+        print("失败的文件:")
+        for path in failed: print(f"  {path}: {results[path][2]}")
+    return len(failed), {path: results[path][3] for path in files if collect_stats}
+
+def run_export_job(job, config, default_output_dir, engine, sheet_workers, cache):
+    """
+    服务模式下执行一个导出任务。job 为 {"path": 工作簿路径, "formats": [格式, ...], "output_dir": 输出目录},
+    formats 与 output_dir 可省略, 默认取配置; 还可以用 sheets、range、shard_rows 覆盖导出范围的设置。
+    其中的 id 字段原样返回, 便于调用方对应任务与结果。
+    返回 {"id", "path", "status": "ok" 或 "failed", "cached", "seconds", "outputs": {格式: 路径}, "error"};
+    因缓存跳过导出时 outputs 不含各工作表的 csv。
+    """
+    start = time.perf_counter()
+    result = {'id': job.get('id') if isinstance(job, dict) else None, 'path': None, 'status': 'failed',
+              'cached': False, 'seconds': 0.0, 'outputs': {}, 'error': ""}
+    try:
+        if not isinstance(job, dict) or not isinstance(job.get('path'), str):
+            raise ExportError("任务必须是包含 path 字段的 JSON 对象")
+        file_path = result['path'] = job['path']
+        if not os.path.isfile(file_path): raise ExportError(f"文件 '{file_path}' 不存在")
+        if not file_path.lower().endswith('.xlsx'): raise ExportError(f"文件 '{file_path}' 不是 .xlsx 格式")
+        formats = job.get('formats', config['outputs']['default_formats'])
+        if not isinstance(formats, list): raise ExportError("formats 必须是格式名称的列表")
+        unknown = [fmt for fmt in formats if fmt not in VISUAL_FORMATS + ARCHIVE_FORMATS + ('csv',)]
+        if unknown: raise ExportError(f"未知的输出格式: {', '.join(map(str, unknown))}")
+        # 与命令行参数相同的类型要求: --sheet 可重复的名称、--range 文本、--shard-rows 整数
+        sheets, range_text, shard_rows = job.get('sheets'), job.get('range'), job.get('shard_rows')
+        if sheets is not None and not (isinstance(sheets, list) and all(isinstance(name, str) for name in sheets)):
+            raise ExportError("sheets 必须是工作表名称 (可含通配符) 的列表")
+        if range_text is not None and not isinstance(range_text, str):
+            raise ExportError("range 必须是 A1 形式的区域或命名区域名称的文本")
+        if shard_rows is not None and type(shard_rows) is not int: raise ExportError("shard_rows 必须是整数")
+        if job.get('output_dir') is not None and not isinstance(job['output_dir'], str):
+            raise ExportError("output_dir 必须是目录路径的文本")
+        output_dir = job.get('output_dir') or default_output_dir
+        os.makedirs(output_dir, exist_ok=True)
+        job_config = {**config, 'outputs': {**config['outputs'], 'default_formats': list(formats)}}
+        job_config = apply_selection_overrides(job_config, sheets, range_text, shard_rows)
+        name_without_ext = os.path.splitext(os.path.basename(file_path))[0]
+        output_files = build_output_files(output_dir, name_without_ext, formats)
+        stats = ExportStats(enabled=False)
+        with contextlib.redirect_stdout(io.StringIO()):
+            output_paths = export_excel_to_text(file_path=file_path, config=job_config, output_dir=output_dir,
+                                                name_without_ext=name_without_ext, engine=engine, sheet_workers=sheet_workers,
+                                                cache=cache, stats=stats, **output_files)
+        result['cached'] = stats.workbook_cached
+        result['outputs'] = output_paths if output_paths is not None else {
+            fmt: output_files[fmt] for fmt in VISUAL_FORMATS + ARCHIVE_FORMATS if output_files.get(fmt)}
+        result['status'] = 'ok'
+    except Exception as e:
+        result['error'] = ' '.join(str(e).split('\n'))
+    result['seconds'] = round(time.perf_counter() - start, 6)
+    return result
+
+def _serve_lines(lines, out, run_job):
+    """逐行读取 JSON 任务, 每个任务执行完后把结果作为一行 JSON 写出。"""
+    for line in lines:
+        if not line.strip(): continue
+        try:
+            job = json.loads(line)
+        except ValueError as e:
+            result = {'id': None, 'path': None, 'status': 'failed', 'cached': False, 'seconds': 0.0, 'outputs': {},
+                      'error': f"无法解析任务: {e}"}
+        else:
+            result = run_job(job)
+        out.write(json.dumps(result, ensure_ascii=False) + "\n")
+        out.flush()
+
+def serve(run_job, socket_path=None):
+    """
+    服务模式: 进程常驻, 依赖库与配置只加载一次, 之后逐个执行导出任务, 省去每个文件的解释器启动与导入开销。
+    socket_path 为空时从标准输入逐行读取任务, 结果逐行写到标准输出, 直到输入结束;
+    否则在该路径监听 Unix 套接字, 每个连接内同样逐行收发, 多个连接依次处理, 直到进程被中断。
+    """
+    if socket_path is None:
+        print("服务模式: 从标准输入逐行读取导出任务 (JSON), 结果逐行写到标准输出。", file=sys.stderr)
+        _serve_lines(sys.stdin, sys.stdout, run_job)
+        return
+
+    import signal
+    import socket
+    import stat
+    if not hasattr(socket, 'AF_UNIX'): raise ExportError("当前平台不支持 Unix 套接字, 请改用标准输入模式")
+    if os.path.exists(socket_path):
+        # 只清理上次运行遗留的套接字文件, 不覆盖其他文件
+        if not stat.S_ISSOCK(os.stat(socket_path).st_mode): raise ExportError(f"'{socket_path}' 已存在且不是套接字文件")
+        os.remove(socket_path)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server:
+        server.bind(socket_path)
+        server.listen()
+        # 由进程管理器以 SIGTERM 停止时与 Ctrl+C 一样退出, 并删除套接字文件
+        signal.signal(signal.SIGTERM, signal.default_int_handler)
+        print(f"服务模式: 正在监听 {socket_path}, 按 Ctrl+C 退出。", flush=True)
+        try:
+            while True:
+                conn, _ = server.accept()
+                with conn, conn.makefile('r', encoding='utf-8') as reader, conn.makefile('w', encoding='utf-8') as writer:
+                    try:
+                        _serve_lines(reader, writer, run_job)
+                    except OSError:
+                        # 客户端提前断开时只结束该连接
+                        pass
+        except KeyboardInterrupt:
+            print("\n服务已停止。")
+        finally:
+            os.remove(socket_path)
 
 if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print("用法: python export_excel.py <example.xlsx>")
-        sys.exit(1)
-    input_excel_file = sys.argv[1]
+    parser = argparse.ArgumentParser(description="将 Excel 导出为多种可读的可视化文件和结构化的数据归档文件。")
+    parser.add_argument('inputs', nargs='*', metavar='example.xlsx',
+                        help="要导出的 .xlsx 文件; 也可以是目录 (递归查找 .xlsx) 或通配符, 给出多个输入时进入批量模式")
+    parser.add_argument('--manifest', metavar='FILE', help="批量模式: 从清单文件读取输入路径, 每行一个")
+    parser.add_argument('-j', '--jobs', type=int, metavar='N',
+                        help="批量模式: 并行工作进程数, 默认取配置 batch.max_workers (0 表示 CPU 核数)")
+    parser.add_argument('--sheet-jobs', type=int, metavar='N',
+                        help="单个工作簿内按工作表并行导出的进程数, 默认取配置 batch.sheet_workers (0 表示 CPU 核数, 1 表示顺序导出)")
+    parser.add_argument('--no-cache', action='store_true', help="本次运行不读取也不写入导出缓存")
+    parser.add_argument('--clear-cache', action='store_true', help="清空导出缓存目录; 未指定输入时清空后直接退出")
+    parser.add_argument('--engine', choices=ENGINES, default='xml',
+                        help="工作簿读取引擎: xml 为单次解析引擎 (默认), openpyxl-stream 为 openpyxl 只读流式模式, openpyxl 为兼容性回退")
+    parser.add_argument('--sheet', action='append', metavar='NAME',
+                        help="只导出此工作表, 可使用通配符 (如 '销售*'), 可重复指定; 默认取配置 selection.sheets")
+    parser.add_argument('--range', metavar='RANGE',
+                        help="只导出此范围: A1 形式的区域 (如 A1:F200、B:D、2:500) 或命名区域的名称; 默认取配置 selection.range")
+    parser.add_argument('--shard-rows', type=int, metavar='N',
+                        help="可视化表格与 CSV 每 N 行拆分为一个文件, 0 表示不拆分; 默认取配置 selection.shard_rows")
+    parser.add_argument('--serve', action='store_true',
+                        help="服务模式: 常驻进程, 从标准输入 (或 --socket 指定的 Unix 套接字) 逐行读取 JSON 导出任务并逐行返回结果")
+    parser.add_argument('--socket', metavar='PATH', help="服务模式: 在此路径监听 Unix 套接字, 而不是读取标准输入")
+    parser.add_argument('--stats', nargs='?', const='table', choices=('table', 'json'),
+                        help="导出结束后输出分阶段统计 (耗时、单元格数、写出字节数), 默认为文本表格, 也可指定 json")
+    parser.add_argument('--stats-memory', action='store_true',
+                        help="统计中另外用 tracemalloc 记录峰值内存 (隐含 --stats); 会使导出整体慢数倍, 此时的耗时不代表正常运行")
+    parser.add_argument('--stats-output', metavar='FILE', help="将 --stats 的统计写入此文件, 而不是打印到标准输出")
+    parser.add_argument('--profile', metavar='FILE', help="用 cProfile 剖析本次运行 (仅主进程), 结果写入此文件, 可用 pstats 或 snakeviz 查看")
+    args = parser.parse_args()
+    if args.stats_memory and not args.stats: args.stats = 'table'
+    if not args.inputs and not args.manifest and not args.clear_cache and not args.serve:
+        parser.error("请至少指定一个输入文件、目录、通配符或 --manifest 清单")
+
+    script_dir = os.path.dirname(os.path.realpath(__file__))
+    if args.clear_cache:
+        config = load_config(os.path.join(script_dir, 'config.toml'))
+        cache_dir = os.path.join(script_dir, config['cache']['directory'])
+        ExportCache(cache_dir, 0).clear()
+        print(f"已清空缓存目录: {cache_dir}")
+        if not args.inputs and not args.manifest and not args.serve: sys.exit(0)
+    if args.profile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+        def dump_profile():
+            profiler.disable()
+            profiler.dump_stats(args.profile)
+            print(f"已写入剖析结果: {args.profile}")
+        atexit.register(dump_profile)
+
+    if args.serve:
+        config = apply_selection_overrides(load_config(os.path.join(script_dir, 'config.toml')), args.sheet, args.range, args.shard_rows)
+        sheet_workers = args.sheet_jobs if args.sheet_jobs is not None else config['batch']['sheet_workers']
+        if sheet_workers <= 0: sheet_workers = os.cpu_count() or 1
+        cache = open_export_cache(config, script_dir, args.no_cache)
+        default_output_dir = os.path.join(script_dir, config['paths']['output_directory'])
+        try:
+            serve(lambda job: run_export_job(job, config, default_output_dir, args.engine, sheet_workers, cache), args.socket)
+        except ExportError as e:
+            print(f"错误：{e}")
+            sys.exit(1)
+        sys.exit(0)
+
+    batch_mode = bool(args.manifest) or len(args.inputs) > 1 or any(os.path.isdir(p) or glob.has_magic(p) for p in args.inputs)
+
+    if batch_mode:
+        files = collect_input_files(args.inputs, args.manifest)
+        if not files:
+            print("错误: 没有找到任何 .xlsx 文件。")
+            sys.exit(1)
+        config = apply_selection_overrides(load_config(os.path.join(script_dir, 'config.toml')), args.sheet, args.range, args.shard_rows)
+        output_dir = os.path.join(script_dir, config['paths']['output_directory'])
+        os.makedirs(output_dir, exist_ok=True)
+        max_workers = args.jobs if args.jobs is not None else config['batch']['max_workers']
+        if max_workers <= 0: max_workers = os.cpu_count() or 1
+        cache = open_export_cache(config, script_dir, args.no_cache)
+        failed_count, file_stats = run_batch(files, config, output_dir, args.engine, min(max_workers, len(files)), cache, bool(args.stats), args.stats_memory)
+        if args.stats: write_report({'files': file_stats}, args.stats, args.stats_output)
+        sys.exit(1 if failed_count else 0)
+
+    input_excel_file = args.inputs[0]
     if not os.path.exists(input_excel_file):
         print(f"错误: 文件 '{input_excel_file}' 不存在。")
         sys.exit(1)
@@ -409,32 +979,32 @@ if __name__ == "__main__":
         print(f"错误: 文件 '{input_excel_file}' 不是 .xlsx 格式。")
         sys.exit(1)
 
-    script_dir = os.path.dirname(os.path.realpath(__file__))
-    config = load_config(os.path.join(script_dir, 'config.toml'))
+    config = apply_selection_overrides(load_config(os.path.join(script_dir, 'config.toml')), args.sheet, args.range, args.shard_rows)
     output_dir = os.path.join(script_dir, config['paths']['output_directory'])
     os.makedirs(output_dir, exist_ok=True)
     
     base_name = os.path.basename(input_excel_file)
     name_without_ext = os.path.splitext(base_name)[0]
-
-    enabled_formats = config['outputs']['default_formats']
-    output_files = {}
-
-    if 'toml' in enabled_formats: output_files['toml'] = os.path.join(output_dir, f"{name_without_ext}_archive.toml")
-    if 'json' in enabled_formats: output_files['json'] = os.path.join(output_dir, f"{name_without_ext}_archive.json")
-    if 'yaml' in enabled_formats: output_files['yaml'] = os.path.join(output_dir, f"{name_without_ext}_archive.yaml")
-    if 'txt' in enabled_formats: output_files['txt'] = os.path.join(output_dir, f"{name_without_ext}_visual.txt")
-    if 'md_plain' in enabled_formats: output_files['md_plain'] = os.path.join(output_dir, f"{name_without_ext}_visual_plain.md")
-    if 'md_rich' in enabled_formats: output_files['md_rich'] = os.path.join(output_dir, f"{name_without_ext}_visual_rich.md")
-    if 'csv' in enabled_formats: output_files['csv'] = True
+    output_files = build_output_files(output_dir, name_without_ext, config['outputs']['default_formats'])
+    sheet_workers = args.sheet_jobs if args.sheet_jobs is not None else config['batch']['sheet_workers']
+    if sheet_workers <= 0: sheet_workers = os.cpu_count() or 1
 
     print(f"正在处理文件: {input_excel_file}")
+    stats = ExportStats(enabled=bool(args.stats), trace_memory=args.stats_memory)
     try:
         export_excel_to_text(file_path=input_excel_file,
                              config=config,
                              output_dir=output_dir,
                              name_without_ext=name_without_ext,
+                             engine=args.engine,
+                             sheet_workers=sheet_workers,
+                             cache=open_export_cache(config, script_dir, args.no_cache),
+                             stats=stats,
                              **output_files)
         print("\n处理完成！")
+        if args.stats: write_report(stats.to_dict(), args.stats, args.stats_output)
+    except ExportError as e:
+        print(f"\n错误：{e}")
+        sys.exit(1)
     except Exception as e:
-        print(f"\n处理过程中发生未知错误: {e}")
\ No newline at end of file
+        print(f"\n处理过程中发生未知错误: {e}")
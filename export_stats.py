@@ -0,0 +1,191 @@
+"""
+导出过程的分阶段统计。
+
+记录工作簿级阶段 (打开工作簿、拼接片段、写出文件尾与索引) 与每个工作表各阶段的耗时、单元格数,
+以及各输出格式写出的字节数; 用于 --stats 报告。计时本身几乎没有开销, 报告的耗时即正常运行的耗时。
+峰值内存只在 trace_memory 为 True (--stats-memory) 时由 tracemalloc 统计, 只计 Python 分配的内存;
+tracemalloc 会使导出整体慢数倍, 此时的耗时不代表正常运行。
+
+工作表阶段:
+- open: 打开工作表 (读取合并区域、批注、超链接等附属部件)
+- read: 遍历单元格并存入单元格存储 (jsonl 在此阶段逐单元格写出)
+- archive_cells / toml / json / yaml / sqlite: 归档的写出, archive_cells 为 toml/yaml 构建单元格字典
+- csv: 交换格式的生成
+- layout: 可视化布局的计算 (含 txt 列宽)
+- rows: 按行展开单元格存储, 各可视化格式共用
+- render:txt / render:md_plain / render:md_rich: 各可视化格式表格的渲染与写出, 按格式逐行累计;
+  逐行计时只在统计时进行, 每行每个格式多两次计时调用
+- legends: 图例
+"""
+import contextlib
+import json
+import os
+import time
+
+from display_width import get_display_width
+
+SHEET_PHASES = ('open', 'read', 'archive_cells', 'toml', 'json', 'yaml', 'sqlite', 'csv', 'layout', 'rows',
+                'render:txt', 'render:md_plain', 'render:md_rich', 'legends')
+WORKBOOK_PHASES = ('cache', 'open', 'merge', 'finish')
+
+_NO_PHASE = contextlib.nullcontext()
+
+class ExportStats:
+    """
+    一次导出的统计数据。enabled 为 False 时所有方法都不做任何事, 调用方无需判断是否启用统计。
+    工作进程中导出的工作表由各自的 ExportStats 记录, 再通过 sheets 属性传回并 merge 到主进程。
+    trace_memory 为 True 时另外用 tracemalloc 统计峰值内存。
+    """
+
+    def __init__(self, enabled=True, trace_memory=False):
+        self.enabled = enabled
+        self.trace_memory = enabled and trace_memory
+        self.phases = {}
+        self.sheets = {}
+        self.bytes_written = {}
+        self.workbook_cached = False
+        self.total_seconds = None
+        self._start = time.perf_counter()
+        # 只在统计内存时导入 tracemalloc
+        self._tracemalloc = None
+        if self.trace_memory:
+            import tracemalloc
+            if not tracemalloc.is_tracing(): tracemalloc.start()
+            self._tracemalloc = tracemalloc
+
+    def phase(self, name, sheet=None):
+        """累计一个阶段的耗时; sheet 为 None 时计入工作簿级阶段。"""
+        if not self.enabled: return _NO_PHASE
+        return self._timed(self.phases if sheet is None else self._sheet(sheet)['phases'], name)
+
+    def add_time(self, name, seconds, sheet=None):
+        """把在别处累计的耗时计入一个阶段, 用于无法用 phase 包住的逐行计时。"""
+        if not self.enabled: return
+        phases = self.phases if sheet is None else self._sheet(sheet)['phases']
+        phases[name] = phases.get(name, 0.0) + seconds
+
+    @contextlib.contextmanager
+    def _timed(self, phases, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            phases[name] = phases.get(name, 0.0) + time.perf_counter() - start
+
+    def _sheet(self, sheet):
+        return self.sheets.setdefault(sheet, {'seconds': 0.0, 'cells': 0, 'peak_memory': None, 'cached': False, 'phases': {}})
+
+    @contextlib.contextmanager
+    def sheet(self, sheet_name):
+        """统计一个工作表的导出: 总耗时与 (trace_memory 时) 期间的峰值内存。"""
+        if not self.enabled:
+            yield
+            return
+        entry = self._sheet(sheet_name)
+        if self.trace_memory: self._tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            entry['seconds'] += time.perf_counter() - start
+            if self.trace_memory: entry['peak_memory'] = self._tracemalloc.get_traced_memory()[1]
+
+    def count_cells(self, sheet_name, cells):
+        if self.enabled: self._sheet(sheet_name)['cells'] += cells
+
+    def sheet_cached(self, sheet_name):
+        if self.enabled: self._sheet(sheet_name)['cached'] = True
+
+    def merge(self, sheets):
+        """并入工作进程记录的工作表统计。"""
+        if self.enabled and sheets: self.sheets.update(sheets)
+
+    def finish(self, output_paths):
+        """结束统计, output_paths 为 {格式: 输出文件路径或路径列表}, 按文件大小记录写出的字节数。"""
+        if not self.enabled: return
+        self.total_seconds = time.perf_counter() - self._start
+        for fmt, paths in output_paths.items():
+            paths = [paths] if isinstance(paths, str) else paths
+            self.bytes_written[fmt] = sum(os.path.getsize(path) for path in paths if os.path.exists(path))
+
+    def to_dict(self):
+        peaks = [entry['peak_memory'] for entry in self.sheets.values() if entry['peak_memory'] is not None]
+        if self.trace_memory and self._tracemalloc.is_tracing(): peaks.append(self._tracemalloc.get_traced_memory()[1])
+        sheets = []
+        for name, entry in self.sheets.items():
+            seconds = entry['seconds']
+            sheets.append({'name': name, 'cached': entry['cached'], 'seconds': round(seconds, 6), 'cells': entry['cells'],
+                           'cells_per_second': round(entry['cells'] / seconds) if seconds > 0 else None,
+                           'peak_memory_bytes': entry['peak_memory'],
+                           'phases': {phase: round(value, 6) for phase, value in entry['phases'].items()}})
+        return {
+            'total_seconds': None if self.total_seconds is None else round(self.total_seconds, 6),
+            'workbook_cached': self.workbook_cached,
+            'memory_traced': self.trace_memory,
+            'peak_memory_bytes': max(peaks) if peaks else None,
+            'phases': {phase: round(value, 6) for phase, value in self.phases.items()},
+            'sheets': sheets,
+            'bytes_written': self.bytes_written,
+        }
+
+def _format_bytes(size):
+    if size is None: return "-"
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024: return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+def _table(headers, rows):
+    """按显示宽度对齐的文本表格, 第一列左对齐, 其余右对齐。"""
+    widths = [max(get_display_width(row[i]) for row in [headers] + rows) for i in range(len(headers))]
+    lines = []
+    for row in [headers] + rows:
+        cells = [text + " " * (width - get_display_width(text)) if i == 0 else " " * (width - get_display_width(text)) + text
+                 for i, (text, width) in enumerate(zip(row, widths))]
+        lines.append("  ".join(cells).rstrip())
+    return "\n".join(lines)
+
+def format_report(report):
+    """把 ExportStats.to_dict() 的结果格式化为文本表格。"""
+    if report['workbook_cached']: return "工作簿与配置均未变化, 已跳过导出, 无统计数据。"
+    traced = report['memory_traced']
+    lines = [f"总耗时 {report['total_seconds']:.3f}s, " + (f"峰值内存 {_format_bytes(report['peak_memory_bytes'])} (tracemalloc, 耗时不代表正常运行)"
+                                                        if traced else "未统计内存 (可用 --stats-memory)")]
+    workbook_phases = [p for p in WORKBOOK_PHASES if p in report['phases']]
+    if workbook_phases:
+        lines.append("工作簿阶段: " + ", ".join(f"{p} {report['phases'][p]:.3f}s" for p in workbook_phases))
+
+    if report['sheets']:
+        phases = [p for p in SHEET_PHASES if any(p in sheet['phases'] for sheet in report['sheets'])]
+        phases += sorted({p for sheet in report['sheets'] for p in sheet['phases']} - set(SHEET_PHASES))
+        rows = []
+        for sheet in report['sheets']:
+            memory = [_format_bytes(sheet['peak_memory_bytes'])] if traced else []
+            if sheet['cached']:
+                rows.append([sheet['name'], "缓存", "-", "-"] + ["-"] * (len(memory) + len(phases)))
+                continue
+            rate = "-" if sheet['cells_per_second'] is None else f"{sheet['cells_per_second']:,}"
+            rows.append([sheet['name'], f"{sheet['seconds']:.3f}", f"{sheet['cells']:,}", rate] + memory
+                        + [f"{sheet['phases'][p]:.3f}" if p in sheet['phases'] else "-" for p in phases])
+        lines.append("")
+        lines.append(_table(["工作表", "耗时(s)", "单元格", "单元格/秒"] + (["峰值内存"] if traced else []) + phases, rows))
+
+    if report['bytes_written']:
+        lines.append("")
+        lines.append(_table(["格式", "写出"], [[fmt, _format_bytes(size)] for fmt, size in report['bytes_written'].items()]))
+    return "\n".join(lines)
+
+def write_report(report, stats_format='table', path=None):
+    """输出统计报告。report 为单个工作簿的统计, 或批量模式下 {'files': {路径: 统计}}; path 为空时打印到标准输出。"""
+    if stats_format == 'json':
+        text = json.dumps(report, ensure_ascii=False, indent=2)
+    elif 'files' in report:
+        text = "\n\n".join(f"=== {path} ===\n" + (format_report(stats) if stats else "(无统计数据)") for path, stats in report['files'].items())
+    else:
+        text = format_report(report)
+    if path:
+        with open(path, 'w', encoding='utf-8') as f: f.write(text + "\n")
+        print(f"已写入统计: {path}")
+    else:
+        print("\n--- 导出统计 ---")
+        print(text)
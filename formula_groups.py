@@ -0,0 +1,115 @@
+"""
+公式规范化与分组。
+
+公式文本被切分为普通文本片段与单元格引用; 相对引用记录为相对于公式所在单元格的偏移, 绝对引用 ($) 记录原值。
+切分结果 (normalize_formula) 与公式所在位置无关, 可直接作为分组键: 整列下拉填充的公式规范化后完全相同。
+切分是无损的, render_formula 按任意单元格的位置还原出其原始 A1 公式文本, 因此每个单元格只需记录所属的组。
+
+字符串常量、带引号的工作表名与方括号内的结构化引用原样保留; 后接左括号的名称 (如 LOG10() 视为函数名。
+"""
+import re
+
+from openpyxl.utils import column_index_from_string, get_column_letter
+
+_FORMULA_TOKEN_RE = re.compile(r'''
+    "(?:[^"]|"")*"
+  | '(?:[^']|'')*'
+  | \[(?:[^\[\]]|\[[^\[\]]*\])*\]
+  | (?<![\w.$])(?P<c1_abs>\$?)(?P<c1>[A-Z]{1,3}):(?P<c2_abs>\$?)(?P<c2>[A-Z]{1,3})(?![\w(!.])
+  | (?<![\w.$:])(?P<r1_abs>\$?)(?P<r1>[1-9][0-9]*):(?P<r2_abs>\$?)(?P<r2>[1-9][0-9]*)(?![\w(!.:])
+  | (?<![\w.$])(?P<col_abs>\$?)(?P<col>[A-Z]{1,3})(?P<row_abs>\$?)(?P<row>[1-9][0-9]*)(?![\w(!.])
+''', re.VERBOSE)
+
+# 引用片段: ('cell', 行是否绝对, 行或行偏移, 列是否绝对, 列或列偏移)、('cols', ...)、('rows', ...)
+def _axis(is_abs, value, origin):
+    return (True, value) if is_abs else (False, value - origin)
+
+def normalize_formula(formula, r_idx, c_idx):
+    """将位于 (r_idx, c_idx) 的公式切分为与位置无关的片段元组。"""
+    parts, last = [], 0
+    for match in _FORMULA_TOKEN_RE.finditer(formula):
+        groups = match.groupdict()
+        if groups['col'] is not None:
+            ref = ('cell',) + _axis(bool(groups['row_abs']), int(groups['row']), r_idx) + _axis(bool(groups['col_abs']), column_index_from_string(groups['col']), c_idx)
+        elif groups['c1'] is not None:
+            ref = ('cols',) + _axis(bool(groups['c1_abs']), column_index_from_string(groups['c1']), c_idx) + _axis(bool(groups['c2_abs']), column_index_from_string(groups['c2']), c_idx)
+        elif groups['r1'] is not None:
+            ref = ('rows',) + _axis(bool(groups['r1_abs']), int(groups['r1']), r_idx) + _axis(bool(groups['r2_abs']), int(groups['r2']), r_idx)
+        else:
+            continue
+        if match.start() > last: parts.append(formula[last:match.start()])
+        parts.append(ref)
+        last = match.end()
+    if last < len(formula): parts.append(formula[last:])
+    return tuple(parts)
+
+def render_formula(parts, r_idx, c_idx):
+    """按 (r_idx, c_idx) 的位置把片段还原为 A1 公式文本。"""
+    out = []
+    for part in parts:
+        if type(part) is str:
+            out.append(part)
+            continue
+        kind, abs1, v1, abs2, v2 = part
+        if kind == 'cell':
+            row, col = v1 if abs1 else r_idx + v1, v2 if abs2 else c_idx + v2
+            out.append(f"{'$' if abs2 else ''}{get_column_letter(col)}{'$' if abs1 else ''}{row}")
+        elif kind == 'cols':
+            c1, c2 = v1 if abs1 else c_idx + v1, v2 if abs2 else c_idx + v2
+            out.append(f"{'$' if abs1 else ''}{get_column_letter(c1)}:{'$' if abs2 else ''}{get_column_letter(c2)}")
+        else:
+            r1, r2 = v1 if abs1 else r_idx + v1, v2 if abs2 else r_idx + v2
+            out.append(f"{'$' if abs1 else ''}{r1}:{'$' if abs2 else ''}{r2}")
+    return "".join(out)
+
+def _r1c1_axis(axis, is_abs, value):
+    if is_abs: return f"{axis}{value}"
+    return f"{axis}[{value}]" if value else axis
+
+def r1c1_formula(parts):
+    """片段的 R1C1 形式文本, 用于在归档中展示一组公式共同的相对形式。"""
+    out = []
+    for part in parts:
+        if type(part) is str:
+            out.append(part)
+            continue
+        kind, abs1, v1, abs2, v2 = part
+        if kind == 'cell': out.append(_r1c1_axis('R', abs1, v1) + _r1c1_axis('C', abs2, v2))
+        elif kind == 'cols': out.append(_r1c1_axis('C', abs1, v1) + ":" + _r1c1_axis('C', abs2, v2))
+        else: out.append(_r1c1_axis('R', abs1, v1) + ":" + _r1c1_axis('R', abs2, v2))
+    return "".join(out)
+
+def compress_ranges(cells):
+    """
+    将按行优先顺序给出的单元格 (行, 列) 合并为矩形区域, 返回 A1 区域文本列表。
+    先把每列中连续的行合并为行段, 再把相邻列中行段完全相同的合并为矩形。
+    """
+    runs = {}
+    for r_idx, c_idx in cells:
+        col_runs = runs.setdefault(c_idx, [])
+        if col_runs and col_runs[-1][1] == r_idx - 1: col_runs[-1][1] = r_idx
+        else: col_runs.append([r_idx, r_idx])
+
+    rectangles = []
+    open_rects = {}  # (起始行, 结束行) -> [起始列, 结束列]
+    for c_idx in sorted(runs):
+        current = {}
+        for start, end in runs[c_idx]:
+            rect = open_rects.get((start, end))
+            if rect is not None and rect[1] == c_idx - 1:
+                rect[1] = c_idx
+            else:
+                rect = [c_idx, c_idx]
+            current[(start, end)] = rect
+        # 本列没有延续的矩形 (包括被同一行段的新矩形取代的) 就此结束
+        for key, rect in open_rects.items():
+            if current.get(key) is not rect: rectangles.append(key + tuple(rect))
+        open_rects = current
+    rectangles.extend(key + tuple(rect) for key, rect in open_rects.items())
+
+    ranges = []
+    for min_row, max_row, min_col, max_col in sorted(rectangles, key=lambda rect: (rect[0], rect[2])):
+        first = f"{get_column_letter(min_col)}{min_row}"
+        last = f"{get_column_letter(max_col)}{max_row}"
+        ranges.append(first if first == last else f"{first}:{last}")
+    return ranges
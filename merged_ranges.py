@@ -0,0 +1,73 @@
+"""
+合并单元格区域的区间索引。
+
+区域按所覆盖的行分桶 (每桶 MERGE_BUCKET_ROWS 行), 桶内按起始列排序。查询某个单元格时只需在其所在的桶内
+二分查找, 不必把区域展开为逐个单元格: 整列、整行或大面积的合并区域也只占用与所跨桶数成正比的空间。
+"""
+from bisect import bisect_right
+from itertools import accumulate
+
+MERGE_BUCKET_SHIFT = 8
+MERGE_BUCKET_ROWS = 1 << MERGE_BUCKET_SHIFT
+
+class MergedRangeIndex:
+    """
+    合并区域的集合, 每个区域为 (min_col, min_row, max_col, max_row)。
+    可直接迭代得到全部区域; find/primary_of/is_secondary/in_row 按单元格或行查询。
+    """
+
+    def __init__(self, ranges=()):
+        self._ranges = list(ranges)
+        self._buckets = None
+
+    def add(self, bounds):
+        self._ranges.append(tuple(bounds))
+        self._buckets = None
+
+    def __iter__(self):
+        return iter(self._ranges)
+
+    def __len__(self):
+        return len(self._ranges)
+
+    def _build(self):
+        grouped = {}
+        for bounds in self._ranges:
+            _, min_row, _, max_row = bounds
+            for bucket in range(min_row >> MERGE_BUCKET_SHIFT, (max_row >> MERGE_BUCKET_SHIFT) + 1):
+                grouped.setdefault(bucket, []).append(bounds)
+        self._buckets = {}
+        for bucket, ranges in grouped.items():
+            ranges.sort()
+            # reach[i] 为前 i+1 个区域中最大的结束列, 向前查找时一旦小于目标列即可停止
+            reach = list(accumulate((bounds[2] for bounds in ranges), max))
+            self._buckets[bucket] = ([bounds[0] for bounds in ranges], reach, ranges)
+
+    def find(self, r, c):
+        """返回覆盖 (r, c) 的合并区域, 不在任何合并区域中时返回 None。"""
+        if self._buckets is None: self._build()
+        bucket = self._buckets.get(r >> MERGE_BUCKET_SHIFT)
+        if bucket is None: return None
+        starts, reach, ranges = bucket
+        i = bisect_right(starts, c) - 1
+        while i >= 0 and reach[i] >= c:
+            bounds = ranges[i]
+            if bounds[2] >= c and bounds[1] <= r <= bounds[3]: return bounds
+            i -= 1
+        return None
+
+    def primary_of(self, r, c):
+        """(r, c) 是合并区域中被覆盖的单元格时, 返回该区域左上角的 (行, 列); 否则返回 None。"""
+        bounds = self.find(r, c)
+        if bounds is None or (bounds[1], bounds[0]) == (r, c): return None
+        return bounds[1], bounds[0]
+
+    def is_secondary(self, r, c):
+        return self.primary_of(r, c) is not None
+
+    def in_row(self, r):
+        """返回与第 r 行相交的合并区域, 按起始列排序。"""
+        if self._buckets is None: self._build()
+        bucket = self._buckets.get(r >> MERGE_BUCKET_SHIFT)
+        if bucket is None: return []
+        return [bounds for bounds in bucket[2] if bounds[1] <= r <= bounds[3]]
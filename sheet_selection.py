@@ -0,0 +1,67 @@
+"""
+导出范围的选择。
+
+- 工作表: 按名称或通配符 (fnmatch 语法, 区分大小写) 选择, 未选中的工作表不会被打开或解析。
+- 单元格范围: A1 形式的区域 (如 "A1:F200"、"B:D"、"2:500") 或命名区域的名称。命名区域只导出其引用的工作表,
+  同一工作表上有多个区域时取它们的外接矩形。范围以 (min_col, min_row, max_col, max_row) 表示, None 为不限。
+- 按行拆分: 可视化表格与 CSV 每 shard_rows 行拆分为一个文件, 见 shard_row_ranges。
+"""
+import fnmatch
+
+from openpyxl.utils.cell import range_boundaries
+from openpyxl.workbook.defined_name import DefinedName
+
+class SelectionError(ValueError):
+    """选择条件无效 (如区域无法解析) 或没有选中任何工作表时抛出。"""
+
+def select_sheets(sheetnames, patterns):
+    """按工作簿中的顺序返回与任一名称或通配符匹配的工作表; patterns 为空时返回全部工作表。"""
+    if not patterns: return list(sheetnames)
+    unmatched = [p for p in patterns if not any(fnmatch.fnmatchcase(name, p) for name in sheetnames)]
+    if unmatched: print(f"提示: 没有与 {', '.join(unmatched)} 匹配的工作表。")
+    return [name for name in sheetnames if any(fnmatch.fnmatchcase(name, p) for p in patterns)]
+
+def _named_range_bounds(attr_text, sheet_name):
+    """命名区域在该工作表上的外接矩形; 不引用该工作表时返回 None。"""
+    try:
+        destinations = [range_boundaries(coord) for title, coord in DefinedName("_", attr_text=attr_text).destinations if title == sheet_name]
+    except (ValueError, TypeError, AttributeError):
+        raise SelectionError(f"命名区域的引用 '{attr_text}' 不是单元格区域") from None
+    if not destinations: return None
+    mins = lambda values: None if None in values else min(values)
+    maxs = lambda values: None if None in values else max(values)
+    return (mins([d[0] for d in destinations]), mins([d[1] for d in destinations]),
+            maxs([d[2] for d in destinations]), maxs([d[3] for d in destinations]))
+
+def resolve_selection(reader, sheet_patterns, range_text):
+    """
+    返回 {工作表名: 范围} (按工作簿中的顺序), 范围为 None 表示整个工作表。
+    range_text 先按命名区域查找, 找不到时按 A1 区域解析。
+    """
+    sheet_names = select_sheets(reader.sheetnames, sheet_patterns)
+    if not range_text:
+        selection = dict.fromkeys(sheet_names)
+    else:
+        named = {name: reader.named_ranges(name).get(range_text) for name in sheet_names}
+        if any(named.values()):
+            selection = {}
+            for name, attr_text in named.items():
+                if attr_text and (bounds := _named_range_bounds(attr_text, name)) is not None: selection[name] = bounds
+        else:
+            try:
+                bounds = range_boundaries(range_text.replace("$", ""))
+            except ValueError:
+                raise SelectionError(f"'{range_text}' 既不是 A1 形式的区域, 也不是所选工作表可见的命名区域") from None
+            selection = dict.fromkeys(sheet_names, bounds)
+    if not selection: raise SelectionError("没有选中任何工作表")
+    return selection
+
+def in_bounds(bounds, r_idx, c_idx):
+    min_col, min_row, max_col, max_row = bounds
+    return ((min_row is None or r_idx >= min_row) and (max_row is None or r_idx <= max_row)
+            and (min_col is None or c_idx >= min_col) and (max_col is None or c_idx <= max_col))
+
+def shard_row_ranges(min_r, max_r, shard_rows):
+    """把行范围 [min_r, max_r] 每 shard_rows 行分为一段, 返回 [(起始行, 结束行), ...]; shard_rows 为 0 时不拆分。"""
+    if shard_rows <= 0 or max_r - min_r + 1 <= shard_rows: return [(min_r, max_r)]
+    return [(lo, min(lo + shard_rows - 1, max_r)) for lo in range(min_r, max_r + 1, shard_rows)]
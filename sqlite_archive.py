@@ -0,0 +1,160 @@
+"""
+SQLite 数据归档。
+
+每个工作簿导出为一个 SQLite 数据库, 表结构见 SCHEMA: 工作表、单元格、命名区域、合并区域、条件格式规则与公式组
+各占一张表, 以 sheet_id 关联到 sheets; 全局命名区域只存一份, 其 sheet_id 为 NULL。整个导出在一个事务内用 executemany 分批插入, 索引在写完后统一建立,
+之后按工作表与坐标、按公式文本的查询都可以直接走索引, 无需重新加载整个 JSON 归档。
+
+并行或缓存导出时每个工作表先写成只含该工作表的片段数据库 (不建索引), 再由主进程按顺序复制到最终的数据库中。
+"""
+import datetime
+import itertools
+import json
+import os
+import sqlite3
+
+from openpyxl.utils import get_column_letter
+
+SQLITE_BATCH_SIZE = 4096
+
+SCHEMA = """
+CREATE TABLE sheets (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    data_boundary TEXT
+);
+CREATE TABLE cells (
+    sheet_id INTEGER NOT NULL REFERENCES sheets(id),
+    coord TEXT NOT NULL,
+    row INTEGER NOT NULL,
+    col INTEGER NOT NULL,
+    value,
+    type TEXT,
+    formula TEXT,
+    comment TEXT,
+    hyperlink TEXT
+);
+CREATE TABLE named_ranges (
+    sheet_id INTEGER REFERENCES sheets(id),
+    name TEXT NOT NULL,
+    destination TEXT
+);
+CREATE TABLE merged_ranges (
+    sheet_id INTEGER NOT NULL REFERENCES sheets(id),
+    range TEXT NOT NULL,
+    min_row INTEGER NOT NULL,
+    min_col INTEGER NOT NULL,
+    max_row INTEGER NOT NULL,
+    max_col INTEGER NOT NULL
+);
+CREATE TABLE conditional_formatting (
+    sheet_id INTEGER NOT NULL REFERENCES sheets(id),
+    range TEXT NOT NULL,
+    type TEXT,
+    operator TEXT,
+    formula TEXT
+);
+CREATE TABLE formula_groups (
+    sheet_id INTEGER NOT NULL REFERENCES sheets(id),
+    tag TEXT NOT NULL,
+    formula TEXT,
+    r1c1 TEXT,
+    ranges TEXT
+);
+"""
+
+INDEXES = """
+CREATE INDEX idx_sheets_name ON sheets(name);
+CREATE UNIQUE INDEX idx_cells_coord ON cells(sheet_id, coord);
+CREATE INDEX idx_cells_formula ON cells(formula) WHERE formula IS NOT NULL;
+CREATE INDEX idx_named_ranges_name ON named_ranges(name);
+CREATE INDEX idx_merged_ranges_sheet ON merged_ranges(sheet_id);
+CREATE INDEX idx_conditional_formatting_sheet ON conditional_formatting(sheet_id);
+CREATE INDEX idx_formula_groups_sheet ON formula_groups(sheet_id);
+"""
+
+# 除 sheets 外按 sheet_id 关联的表, 及其除 sheet_id 以外的列数
+_SHEET_TABLES = {'cells': 8, 'named_ranges': 2, 'merged_ranges': 5, 'conditional_formatting': 4, 'formula_groups': 4}
+
+def _cell_value(value):
+    """返回 (存入数据库的值, 值类型)。日期时间存为 ISO 格式文本, 布尔值存为 0/1。"""
+    if value is None: return None, None
+    if isinstance(value, bool): return int(value), 'boolean'
+    if isinstance(value, (int, float)): return value, 'number'
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)): return value.isoformat(), 'datetime'
+    if isinstance(value, str): return value, 'string'
+    return str(value), 'string'
+
+class SqliteArchive:
+    """单个工作簿的 SQLite 归档。fragment 为 True 时写出只含一个工作表的片段数据库, 不建立索引。"""
+
+    def __init__(self, path, fragment=False):
+        self.path = path
+        self.fragment = fragment
+        if os.path.exists(path): os.remove(path)
+        self.conn = sqlite3.connect(path, isolation_level=None)
+        # 输出文件每次都重新生成, 导出中断时整个文件作废, 不需要回滚日志
+        self.conn.execute("PRAGMA journal_mode = OFF")
+        self.conn.execute("PRAGMA synchronous = OFF")
+        self.conn.executescript(SCHEMA)
+        self.conn.execute("BEGIN")
+        self.sheet_count = 0
+
+    def close(self, commit=True):
+        if commit:
+            self.conn.execute("COMMIT")
+            if not self.fragment: self.conn.executescript(INDEXES)
+        self.conn.close()
+
+    def _insert(self, table, rows):
+        """分批执行 executemany, rows 可以是任意可迭代对象, 不会一次全部展开。"""
+        placeholders = ", ".join("?" * (_SHEET_TABLES[table] + 1))
+        sql = f"INSERT INTO {table} VALUES ({placeholders})"
+        rows = iter(rows)
+        while (batch := list(itertools.islice(rows, SQLITE_BATCH_SIZE))):
+            self.conn.executemany(sql, batch)
+
+    def _add_sheet(self, name, data_boundary):
+        self.sheet_count += 1
+        self.conn.execute("INSERT INTO sheets VALUES (?, ?, ?)", (self.sheet_count, name, data_boundary))
+        return self.sheet_count
+
+    def write_global_names(self, named_ranges):
+        """写入工作簿级 (全局) 命名区域 {名称: 引用}, 其 sheet_id 为 NULL。"""
+        self._insert('named_ranges', ((None, name, dest) for name, dest in named_ranges.items()))
+
+    def write_sheet(self, sheet_data, cells=(), merged_ranges=(), local_named_ranges=None):
+        """
+        写入一个工作表。sheet_data 为该工作表的归档数据 (不含 cells 项也可);
+        cells 产出 (行, 列, 坐标, 单元格归档数据), merged_ranges 为 (min_col, min_row, max_col, max_row) 的集合,
+        local_named_ranges 为只属于该工作表的命名区域 (全局名称由 write_global_names 写入)。
+        """
+        data_boundary = sheet_data.get('data_boundary')
+        sheet_id = self._add_sheet(sheet_data['name'], None if data_boundary == 'empty' else data_boundary)
+        self._insert('named_ranges', ((sheet_id, name, dest) for name, dest in (local_named_ranges or {}).items()))
+        self._insert('conditional_formatting', (
+            (sheet_id, rule['range'], rule['type'], rule.get('operator'), json.dumps(rule['formula'], ensure_ascii=False) if 'formula' in rule else None)
+            for rule in sheet_data.get('conditional_formatting', [])))
+        self._insert('formula_groups', ((sheet_id, group['tag'], group['formula'], group['r1c1'], " ".join(group['ranges']))
+                                        for group in sheet_data.get('formula_groups', [])))
+        self._insert('merged_ranges', (
+            (sheet_id, _range_text(bounds), bounds[1], bounds[0], bounds[3], bounds[2]) for bounds in merged_ranges))
+        self._insert('cells', (
+            (sheet_id, coord, r_idx, c_idx, *_cell_value(cell.get('value')), cell.get('formula'), cell.get('comment'), cell.get('hyperlink'))
+            for r_idx, c_idx, coord, cell in cells))
+
+    def append_fragment(self, fragment_path):
+        """把片段数据库中的工作表复制到本数据库, 重新分配 sheet_id。"""
+        src = sqlite3.connect(fragment_path)
+        try:
+            for src_id, name, data_boundary in src.execute("SELECT * FROM sheets ORDER BY id").fetchall():
+                sheet_id = self._add_sheet(name, data_boundary)
+                for table in _SHEET_TABLES:
+                    rows = src.execute(f"SELECT * FROM {table} WHERE sheet_id = ? ORDER BY rowid", (src_id,))
+                    self._insert(table, ((sheet_id,) + row[1:] for row in rows))
+        finally:
+            src.close()
+
+def _range_text(bounds):
+    min_col, min_row, max_col, max_row = bounds
+    return f"{get_column_letter(min_col)}{min_row}:{get_column_letter(max_col)}{max_row}"
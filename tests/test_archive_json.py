@@ -0,0 +1,77 @@
+import datetime
+import io
+import json
+import textwrap
+
+import pytest
+
+import export_excel
+from export_excel import ArchiveWriters, json_default_serializer
+
+def make_cells(count):
+    cells = []
+    for i in range(count):
+        cell = {'value': i * 1.5 if i % 3 else f"文本 \"{i}\"\n"}
+        if i % 4 == 0: cell['formula'] = f"=A{i + 1}*2"
+        if i % 5 == 0: cell['value'] = datetime.datetime(2024, 1, 1 + i % 28, 3, 4, 5)
+        cells.append((f"A{i + 1}", cell))
+    return cells
+
+def make_sheet(name, cells):
+    return {'name': name, 'named_ranges': {'Total': f"'{name}'!$A$1"}, 'conditional_formatting': [],
+            'data_boundary': f"A1:A{max(len(cells), 1)}", 'cells': dict(cells)}
+
+class FakeStore:
+    """只提供 write_sheet 所需的 iter_archive_cells。"""
+
+    def __init__(self, cells):
+        self.cells = cells
+
+    def iter_archive_cells(self):
+        return iter(self.cells)
+
+@pytest.fixture(params=[False, True], ids=['indent', 'minify'])
+def minify(request):
+    return request.param
+
+@pytest.fixture(params=[1, 3, 1024])
+def chunk_size(request, monkeypatch):
+    monkeypatch.setattr(export_excel, 'JSON_CELLS_CHUNK_SIZE', request.param)
+    return request.param
+
+@pytest.mark.parametrize("sheet_sizes", [[], [0], [5], [5, 0, 12]])
+def test_archive_file_matches_json_dumps(tmp_path, sheet_sizes, minify):
+    path = tmp_path / "archive.json"
+    sheets = [make_sheet(f"Sheet{i}", make_cells(size)) for i, size in enumerate(sheet_sizes)]
+    with ArchiveWriters({'json': str(path)}, {'outputs': {'minify_json': minify}}) as writers:
+        for sheet in sheets: writers.write_sheet(sheet)
+
+    expected = json.dumps({'sheets': sheets}, ensure_ascii=False, indent=None if minify else 4, default=json_default_serializer)
+    assert path.read_text(encoding='utf-8') == expected
+
+@pytest.mark.parametrize("count", [0, 1, 2, 3, 4, 7, 9])
+def test_chunked_sheet_matches_json_dumps(count, minify, chunk_size):
+    writers = ArchiveWriters({}, {'outputs': {'minify_json': minify}})
+    cells = make_cells(count)
+    sheet = make_sheet("数据", cells)
+    out = io.StringIO()
+    writers._write_json_sheet_with_cells(out, {k: v for k, v in sheet.items() if k != 'cells'}, iter(cells))
+
+    indent = None if minify else 4
+    expected = json.dumps(sheet, ensure_ascii=False, indent=indent, default=json_default_serializer)
+    if indent is not None: expected = textwrap.indent(expected, " " * 8)
+    assert out.getvalue() == expected
+
+@pytest.mark.parametrize("sheet_sizes", [[], [0], [5], [5, 0, 12]])
+def test_streamed_cells_match_json_dumps(tmp_path, sheet_sizes, minify, chunk_size):
+    path = tmp_path / "archive.json"
+    sheets = []
+    with ArchiveWriters({'json': str(path)}, {'outputs': {'minify_json': minify}}) as writers:
+        for i, size in enumerate(sheet_sizes):
+            cells = make_cells(size)
+            sheet = make_sheet(f"Sheet{i}", cells)
+            sheets.append(sheet)
+            writers.write_sheet({k: v for k, v in sheet.items() if k != 'cells'}, store=FakeStore(cells))
+
+    expected = json.dumps({'sheets': sheets}, ensure_ascii=False, indent=None if minify else 4, default=json_default_serializer)
+    assert path.read_text(encoding='utf-8') == expected
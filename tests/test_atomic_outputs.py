@@ -0,0 +1,30 @@
+import os
+
+import pytest
+
+from export_excel import ArchiveWriters, ExportError, VisualWriters
+
+CONFIG = {'outputs': {'minify_json': False}}
+
+def test_failed_export_keeps_previous_outputs(tmp_path):
+    paths = {'txt': str(tmp_path / "a_visual.txt"), 'json': str(tmp_path / "a_archive.json"), 'sqlite': str(tmp_path / "a_archive.sqlite")}
+    for path in paths.values():
+        with open(path, 'w', encoding='utf-8') as f: f.write("上次的输出")
+    with pytest.raises(ExportError):
+        with VisualWriters(paths) as visual, ArchiveWriters(paths, CONFIG) as archive:
+            visual.write('txt', "写了一半")
+            archive.write_sheet({'name': "Sheet1", 'cells': {}})
+            raise ExportError("中途出错")
+    for path in paths.values():
+        with open(path, encoding='utf-8') as f: assert f.read() == "上次的输出"
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted(os.path.basename(path) for path in paths.values())
+
+def test_outputs_replaced_after_success(tmp_path):
+    paths = {'txt': str(tmp_path / "a_visual.txt"), 'json': str(tmp_path / "a_archive.json")}
+    with VisualWriters(paths) as visual, ArchiveWriters(paths, CONFIG) as archive:
+        visual.write('txt', "完整的输出\n")
+        archive.write_sheet({'name': "Sheet1", 'cells': {}})
+        assert not (tmp_path / "a_visual.txt").exists()
+    assert (tmp_path / "a_visual.txt").read_text(encoding='utf-8') == "完整的输出\n"
+    assert '"Sheet1"' in (tmp_path / "a_archive.json").read_text(encoding='utf-8')
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["a_archive.json", "a_visual.txt"]
@@ -0,0 +1,16 @@
+from export_cache import ExportCache
+
+def test_clear_only_removes_cache_entries(tmp_path):
+    (tmp_path / "workbooks").mkdir()
+    (tmp_path / "workbooks" / "key.json").write_text("{}")
+    (tmp_path / "sheets" / "key").mkdir(parents=True)
+    (tmp_path / "notes.txt").write_text("keep")
+    ExportCache(str(tmp_path), 0).clear()
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["notes.txt"]
+
+def test_clear_removes_emptied_directory(tmp_path):
+    directory = tmp_path / "cache"
+    (directory / "sheets").mkdir(parents=True)
+    ExportCache(str(directory), 0).clear()
+    assert not directory.exists()
+    ExportCache(str(directory), 0).clear()
@@ -0,0 +1,67 @@
+import random
+
+import pytest
+from openpyxl.utils.cell import range_boundaries
+
+from formula_groups import compress_ranges, normalize_formula, r1c1_formula, render_formula
+
+ROUND_TRIP_FORMULAS = [
+    "=B2*C2",
+    "=$A$1+B2-$C3+D$4",
+    "=SUM(A:A)+SUM($B:C)+COUNT(B:$D)",
+    "=SUM(1:3)+SUM($2:$4)+SUM(5:$6)",
+    "=LOG10(A1)+ATAN2(B2,C3)",
+    "=Sheet2!B3*2+'My Sheet'!$A$1",
+    "='It''s A1'!C5&\"A1 \"\"B2\"\" C3\"",
+    "=Table1[[#This Row],[A1]]*B2",
+    "=XFD1048576+AAA1",
+    "=1.5E+3+A1",
+    "=IF(A1>0,\"yes\",\"no\")",
+    "plain text without references",
+    "",
+]
+
+@pytest.mark.parametrize("formula", ROUND_TRIP_FORMULAS)
+@pytest.mark.parametrize("position", [(1, 1), (10, 5), (300, 27)])
+def test_render_restores_original_formula(formula, position):
+    assert render_formula(normalize_formula(formula, *position), *position) == formula
+
+def test_filled_down_formulas_share_normalized_form():
+    assert normalize_formula("=B2*C2", 2, 4) == normalize_formula("=B3*C3", 3, 4)
+    assert normalize_formula("=SUM($A$1:A2)", 2, 2) == normalize_formula("=SUM($A$1:A9)", 9, 2)
+    assert normalize_formula("=B2*C2", 2, 4) != normalize_formula("=B2*C2", 3, 4)
+
+def test_render_shifts_relative_references_only():
+    parts = normalize_formula("=$A$1+B2+C:C+3:4", 2, 4)
+    assert render_formula(parts, 5, 6) == "=$A$1+D5+E:E+6:7"
+
+def test_literals_and_function_names_are_not_references():
+    parts = normalize_formula("=LOG10(A1)&\"B2\"&'C3'!D4", 1, 1)
+    refs = [part for part in parts if type(part) is not str]
+    assert refs == [('cell', False, 0, False, 0), ('cell', False, 3, False, 3)]
+
+def test_r1c1_form():
+    assert r1c1_formula(normalize_formula("=B2*$C$3+D:D+2:$5", 2, 4)) == "=RC[-2]*R3C3+C:C+R:R5"
+
+@pytest.mark.parametrize("cells, expected", [
+    ([], []),
+    ([(1, 1)], ["A1"]),
+    ([(r, 4) for r in range(2, 12)], ["D2:D11"]),
+    ([(r, c) for r in range(1, 4) for c in range(2, 5)], ["B1:D3"]),
+    ([(1, 1), (3, 1)], ["A1", "A3"]),
+    ([(1, 1), (1, 2), (2, 1)], ["A1:A2", "B1"]),
+    ([(1, 1), (1, 3)], ["A1", "C1"]),
+    ([(1, 1), (1, 2), (2, 2), (3, 1), (3, 2)], ["A1", "B1:B3", "A3"]),
+])
+def test_compress_ranges(cells, expected):
+    assert compress_ranges(cells) == expected
+
+def test_compress_ranges_partitions_cells():
+    rng = random.Random(0)
+    for _ in range(500):
+        cells = sorted({(rng.randint(1, 8), rng.randint(1, 6)) for _ in range(rng.randint(0, 25))})
+        covered = []
+        for text in compress_ranges(cells):
+            min_col, min_row, max_col, max_row = range_boundaries(text if ":" in text else f"{text}:{text}")
+            covered += [(r, c) for r in range(min_row, max_row + 1) for c in range(min_col, max_col + 1)]
+        assert sorted(covered) == cells
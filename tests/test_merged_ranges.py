@@ -0,0 +1,61 @@
+import random
+
+import pytest
+
+from merged_ranges import MERGE_BUCKET_ROWS, MergedRangeIndex
+
+def brute_find(ranges, r, c):
+    for bounds in ranges:
+        min_col, min_row, max_col, max_row = bounds
+        if min_col <= c <= max_col and min_row <= r <= max_row: return bounds
+    return None
+
+BOUNDARY_RANGES = [
+    (1, MERGE_BUCKET_ROWS - 2, 2, MERGE_BUCKET_ROWS + 1),       # 跨越第一个桶边界
+    (3, MERGE_BUCKET_ROWS, 3, MERGE_BUCKET_ROWS),               # 恰好位于下一个桶的首行
+    (4, MERGE_BUCKET_ROWS - 1, 6, MERGE_BUCKET_ROWS - 1),       # 恰好位于桶的末行
+    (1, 2 * MERGE_BUCKET_ROWS - 1, 8, 3 * MERGE_BUCKET_ROWS),   # 跨越多个桶
+    (10, 1, 10, 1048576),                                       # 整列
+    (2, 5, 40, 5),                                              # 宽的单行区域
+]
+
+@pytest.mark.parametrize("r", [1, 5, MERGE_BUCKET_ROWS - 2, MERGE_BUCKET_ROWS - 1, MERGE_BUCKET_ROWS, MERGE_BUCKET_ROWS + 1,
+                               MERGE_BUCKET_ROWS + 2, 2 * MERGE_BUCKET_ROWS - 1, 2 * MERGE_BUCKET_ROWS, 3 * MERGE_BUCKET_ROWS,
+                               3 * MERGE_BUCKET_ROWS + 1, 1048576])
+def test_find_across_bucket_boundaries(r):
+    index = MergedRangeIndex(BOUNDARY_RANGES)
+    for c in range(1, 45):
+        assert index.find(r, c) == brute_find(BOUNDARY_RANGES, r, c), (r, c)
+
+def test_find_matches_brute_force_on_random_ranges():
+    rng = random.Random(0)
+    ranges, taken = [], set()
+    # 合并区域互不重叠
+    while len(ranges) < 200:
+        min_row, min_col = rng.randint(1, 1200), rng.randint(1, 30)
+        max_row, max_col = min_row + rng.choice([0, 0, 1, 3, 300]), min_col + rng.choice([0, 1, 2, 10])
+        cells = {(r, c) for r in range(min_row, max_row + 1) for c in range(min_col, max_col + 1)}
+        if cells & taken: continue
+        taken |= cells
+        ranges.append((min_col, min_row, max_col, max_row))
+    index = MergedRangeIndex()
+    for bounds in ranges: index.add(bounds)
+    for r in range(1, 1600, 7):
+        for c in range(1, 45):
+            assert index.find(r, c) == brute_find(ranges, r, c), (r, c)
+
+def test_primary_secondary_and_in_row():
+    index = MergedRangeIndex(BOUNDARY_RANGES)
+    top = MERGE_BUCKET_ROWS - 2
+    assert index.primary_of(top, 1) is None
+    assert index.primary_of(MERGE_BUCKET_ROWS + 1, 2) == (top, 1)
+    assert index.is_secondary(MERGE_BUCKET_ROWS, 1)
+    assert not index.is_secondary(MERGE_BUCKET_ROWS, 7)
+    assert index.in_row(MERGE_BUCKET_ROWS) == [BOUNDARY_RANGES[0], BOUNDARY_RANGES[1], BOUNDARY_RANGES[4]]
+    assert index.in_row(3 * MERGE_BUCKET_ROWS + 1) == [BOUNDARY_RANGES[4]]
+
+def test_empty_index():
+    index = MergedRangeIndex()
+    assert not index
+    assert index.find(1, 1) is None
+    assert index.in_row(1) == []
@@ -0,0 +1,39 @@
+import sqlite3
+
+from sqlite_archive import SqliteArchive
+
+def named_ranges(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT sheet_id, name, destination FROM named_ranges ORDER BY rowid").fetchall()
+    finally:
+        conn.close()
+
+def test_global_names_are_stored_once(tmp_path):
+    fragment = str(tmp_path / "fragment.sqlite")
+    part = SqliteArchive(fragment, fragment=True)
+    part.write_sheet({'name': "Sheet2", 'data_boundary': "A1:A1"}, local_named_ranges={'Local': "Sheet2!$A$1"})
+    part.close()
+
+    path = str(tmp_path / "archive.sqlite")
+    archive = SqliteArchive(path)
+    archive.write_global_names({'Total': "Sheet1!$A$1:$A$3"})
+    archive.write_sheet({'name': "Sheet1", 'data_boundary': "A1:A3"}, local_named_ranges={})
+    archive.append_fragment(fragment)
+    archive.close()
+
+    assert named_ranges(path) == [(None, 'Total', "Sheet1!$A$1:$A$3"), (2, 'Local', "Sheet2!$A$1")]
+
+def test_formula_prefix_query_uses_index(tmp_path):
+    path = str(tmp_path / "archive.sqlite")
+    archive = SqliteArchive(path)
+    archive.write_sheet({'name': "Sheet1", 'data_boundary': "A1:A1"}, cells=[(1, 1, "A1", {'value': 3, 'formula': "=SUM(B1:B2)"})])
+    archive.close()
+
+    conn = sqlite3.connect(path)
+    try:
+        plan = conn.execute("EXPLAIN QUERY PLAN SELECT coord FROM cells WHERE formula GLOB '=SUM(*'").fetchall()
+        assert conn.execute("SELECT coord FROM cells WHERE formula GLOB '=SUM(*'").fetchall() == [("A1",)]
+    finally:
+        conn.close()
+    assert "idx_cells_formula" in plan[0][-1]
@@ -0,0 +1,305 @@
+"""
+可视化输出的布局与渲染器。
+
+每个工作表只计算一次布局 (SheetLayout): 数据边界、列号、合并区域、txt 所需的列宽以及排好序的图例条目。
+各可视化格式由一个渲染器对象负责, 只为启用的格式创建; 导出流程只遍历一次工作表的各行,
+把每一行交给所有渲染器, 各渲染器返回要写入自己文件的文本。图例文本按样式 (txt / md) 只生成一次,
+由同一样式的渲染器共用。
+
+新增可视化格式时实现一个 Renderer 子类并登记到 RENDERERS 即可, 输出文件名为 <名称><suffix>。
+"""
+from openpyxl.utils import get_column_letter
+
+from display_width import get_display_width
+
+LEGEND_MAX_RANGES = 10
+
+def get_rule_details(rule, is_markdown=False):
+    """
+    辅助函数，用于从单个 Rule 对象中提取详细信息。
+    is_markdown 参数控制输出格式。
+    """
+    rule_type = type(rule).__name__
+    details = [f"**类型**: {rule_type}"] if is_markdown else [f"      类型: {rule_type}"]
+    prefix = "" if is_markdown else "      "
+    if hasattr(rule, 'formula') and rule.formula:
+        formula_str = ', '.join(map(str, rule.formula))
+        details.append(f"{prefix}**公式**: `{formula_str}`" if is_markdown else f"{prefix}公式: {formula_str}")
+    if hasattr(rule, 'operator') and rule.operator:
+        details.append(f"{prefix}**运算符**: {rule.operator}" if is_markdown else f"{prefix}运算符: {rule.operator}")
+    if hasattr(rule, 'text') and rule.text:
+        details.append(f"{prefix}**文本内容**: {rule.text}" if is_markdown else f"{prefix}文本内容: {rule.text}")
+    if hasattr(rule, 'dxf') and rule.dxf:
+        if rule.dxf.font and hasattr(rule.dxf.font, 'color') and rule.dxf.font.color:
+            details.append(f"{prefix}**字体颜色**: {rule.dxf.font.color.rgb}" if is_markdown else f"{prefix}字体颜色: {rule.dxf.font.color.rgb}")
+        if rule.dxf.fill and hasattr(rule.dxf.fill, 'start_color') and rule.dxf.fill.start_color:
+            details.append(f"{prefix}**背景填充色**: {rule.dxf.fill.start_color.rgb}" if is_markdown else f"{prefix}背景填充色: {rule.dxf.fill.start_color.rgb}")
+    return "  \n".join(details) if is_markdown else "\n".join(details)
+
+def formula_ranges_note(ranges, is_markdown=False):
+    """公式组覆盖区域的图例附注; 只有一个单元格的组不加附注。区域过多时只列出前 LEGEND_MAX_RANGES 个。"""
+    if len(ranges) == 1 and ":" not in ranges[0]: return ""
+    text = ", ".join(f"`{r}`" if is_markdown else r for r in ranges[:LEGEND_MAX_RANGES])
+    if len(ranges) > LEGEND_MAX_RANGES: text += f" 等 {len(ranges)} 个区域"
+    return f" (范围: {text})" if is_markdown else f"  (范围: {text})"
+
+def generate_legends(format_type, cfg_legends, entries):
+    """根据指定的格式 ('txt' 或 'md') 生成所有图例部分的字符串。entries 为 SheetLayout.legend_entries。"""
+    out = []
+    is_md = format_type == 'md'
+
+    if entries['named_ranges']:
+        if is_md:
+            out.append(f"\n### {cfg_legends['named_ranges']}\n")
+            out += [f"- **`{name}`**: `{dest}`\n" for name, dest in entries['named_ranges']]
+        else:
+            out.append(f"\n--- {cfg_legends['named_ranges']} ---\n")
+            out += [f"{name}: {dest}\n" for name, dest in entries['named_ranges']]
+
+    formulas, comments, hyperlinks = entries['formulas'], entries['comments'], entries['hyperlinks']
+    if formulas or comments or hyperlinks:
+        if is_md:
+            out.append(f"\n### {cfg_legends['reference_list']}\n")
+            if formulas:
+                out.append(f"\n#### {cfg_legends['expressions']}\n")
+                out += [f"- **`{tag}`**: `{formula}`{formula_ranges_note(ranges, is_markdown=True)}\n" for tag, formula, ranges in formulas]
+            if comments:
+                out.append(f"\n#### {cfg_legends['comments']}\n")
+                out += [f"- **`{tag}`**: {text}\n" for tag, text in comments]
+            if hyperlinks:
+                out.append(f"\n#### {cfg_legends['hyperlinks']}\n")
+                out += [f"- **`{tag}`**: {target}\n" for tag, target in hyperlinks]
+        else:
+            out.append(f"\n--- {cfg_legends['reference_list']} ---\n")
+            if formulas:
+                out.append(f"\n  {cfg_legends['expressions']}:\n")
+                out += [f"  {tag}: {formula}{formula_ranges_note(ranges)}\n" for tag, formula, ranges in formulas]
+            if comments:
+                out.append(f"\n  {cfg_legends['comments']}:\n")
+                out += [f"  {tag}: {text}\n" for tag, text in comments]
+            if hyperlinks:
+                out.append(f"\n  {cfg_legends['hyperlinks']}:\n")
+                out += [f"  {tag}: {target}\n" for tag, target in hyperlinks]
+
+    if entries['conditional_formatting']:
+        if is_md:
+            out.append(f"\n### {cfg_legends['conditional_formatting']}\n")
+            for cf_obj in entries['conditional_formatting']:
+                out.append(f"- **作用范围**: `{cf_obj.sqref}`\n")
+                out += [f"  - **规则 #{i + 1}**\n    - {get_rule_details(rule, is_markdown=True)}\n" for i, rule in enumerate(cf_obj.rules)]
+        else:
+            out.append(f"\n--- {cfg_legends['conditional_formatting']} ---\n")
+            for cf_obj in entries['conditional_formatting']:
+                out.append(f"  - 作用范围: {cf_obj.sqref}\n")
+                out += [f"    - 规则 #{i + 1}\n{get_rule_details(rule)}\n" for i, rule in enumerate(cf_obj.rules)]
+
+    return "".join(out)
+
+class SheetLayout:
+    """
+    一个非空工作表的可视化布局, 每个工作表只计算一次, 供所有渲染器共用。
+    cut_max_c 为所选范围截断列的位置 (没有截断时为无穷大), 被截断的合并区域只合并表格内的部分。
+    """
+
+    def __init__(self, sheet_name, store, merged_ranges, conditional_formatting, named_ranges_map, cfg_legends, cut_max_c=float('inf')):
+        self.sheet_name = sheet_name
+        self.store = store
+        self.texts = store.texts.items
+        self.min_r, self.max_r = store.min_r, store.max_r
+        self.min_c, self.max_c = store.min_c, store.max_c
+        self.letters = [get_column_letter(c) for c in range(self.min_c, self.max_c + 1)]
+        self.merged = merged_ranges
+        self.cut_max_c = cut_max_c
+        self._conditional_formatting = conditional_formatting
+        self._named_ranges_map = named_ranges_map
+        self._cfg_legends = cfg_legends
+        self._col_widths = None
+        self._legend_entries = None
+        self._legend_texts = {}
+
+    @property
+    def col_widths(self):
+        """{列号: 显示宽度}, 为列号与该列各显示文本的最大宽度; 每个不同的文本只计算一次宽度。"""
+        if self._col_widths is None:
+            store = self.store
+            text_widths = store.text_widths()
+            min_r, max_r, min_c, max_c = self.min_r, self.max_r, self.min_c, self.max_c
+            col_widths = {c: get_display_width(letter) for c, letter in enumerate(self.letters, start=min_c)}
+            for r_idx, c_idx, text_id in zip(store.rows, store.cols, store.text_ids):
+                if min_r <= r_idx <= max_r and min_c <= c_idx <= max_c and text_widths[text_id] > col_widths[c_idx]:
+                    col_widths[c_idx] = text_widths[text_id]
+            self._col_widths = col_widths
+        return self._col_widths
+
+    @property
+    def legend_entries(self):
+        """排好序的图例条目: 命名区域、公式组、批注、超链接与条件格式。"""
+        if self._legend_entries is None:
+            store = self.store
+            self._legend_entries = {
+                'named_ranges': sorted(self._named_ranges_map.items()),
+                'formulas': list(store.formulas.legend_items()),
+                'comments': list(store.comments.legend_items()),
+                'hyperlinks': list(store.hyperlinks.legend_items()),
+                'conditional_formatting': list(self._conditional_formatting),
+            }
+        return self._legend_entries
+
+    def legend_text(self, style):
+        """某种样式 ('txt' 或 'md') 的图例文本, 每种样式只生成一次。"""
+        if style not in self._legend_texts:
+            self._legend_texts[style] = generate_legends(style, self._cfg_legends, self.legend_entries)
+        return self._legend_texts[style]
+
+class Renderer:
+    """
+    可视化格式的渲染器。empty_sheet 为类方法, 其余方法作用于构造时给出的布局, 返回要写入的文本。
+    每段表格依次调用 begin_table、逐行调用 row、最后调用 end_table。
+    """
+    suffix = None
+    legend_style = None
+
+    def __init__(self, layout):
+        self.layout = layout
+
+    @classmethod
+    def empty_sheet(cls, sheet_name):
+        raise NotImplementedError
+
+    def shard_index(self, note, part_paths):
+        """按行拆分时写在主文件中的说明与各部分文件的列表。"""
+        raise NotImplementedError
+
+    def begin_table(self, title, lo, hi):
+        """一段表格 (第 lo 至 hi 行) 的标题与表头; title 为工作表名称, 拆分时附带部分编号。"""
+        raise NotImplementedError
+
+    def row(self, r_idx, row_ids):
+        """一行表格; row_ids 为以 min_c 为起点的显示文本编号列表。"""
+        raise NotImplementedError
+
+    def end_table(self):
+        return ""
+
+    def legends(self):
+        return self.layout.legend_text(self.legend_style)
+
+class TxtRenderer(Renderer):
+    """等宽字体对齐的纯文本表格。"""
+    suffix = "_visual.txt"
+    legend_style = 'txt'
+
+    def __init__(self, layout):
+        super().__init__(layout)
+        self.col_widths = layout.col_widths
+        self.text_widths = layout.store.text_widths()
+        self.row_header_width = len(str(layout.max_r))
+
+    @staticmethod
+    def _header(title):
+        return f"工作表: {title}\n" + "-" * 40 + "\n\n"
+
+    @classmethod
+    def empty_sheet(cls, sheet_name):
+        return cls._header(sheet_name) + "(此工作表无数据)\n\n"
+
+    def shard_index(self, note, part_paths):
+        return self._header(self.layout.sheet_name) + f"({note}:)\n" + "".join(f"  {path}\n" for path in part_paths)
+
+    def begin_table(self, title, lo, hi):
+        layout, col_widths, width = self.layout, self.col_widths, self.row_header_width
+        headers_txt = [" " * (col_widths.get(c, 0) - len(letter)) + letter for c, letter in enumerate(layout.letters, start=layout.min_c)]
+        separator_txt = ["-" * col_widths.get(c, 0) for c in range(layout.min_c, layout.max_c + 1)]
+        return (self._header(title) + " " * width + " | " + " | ".join(headers_txt) + "\n"
+                + "-" * width + "-+-" + "-+-".join(separator_txt) + "\n")
+
+    def row(self, r_idx, row_ids):
+        texts, text_widths, col_widths = self.layout.texts, self.text_widths, self.col_widths
+        line_data = [texts[text_id] + " " * (col_widths[c_idx] - text_widths[text_id]) for c_idx, text_id in enumerate(row_ids, start=self.layout.min_c)]
+        return f"{str(r_idx).rjust(self.row_header_width)} | " + " | ".join(line_data) + "\n"
+
+class MarkdownRenderer(Renderer):
+    """Markdown 表格的共同部分。"""
+    legend_style = 'md'
+
+    @staticmethod
+    def _header(title):
+        return f"## 工作表: {title}\n\n"
+
+    @classmethod
+    def empty_sheet(cls, sheet_name):
+        return cls._header(sheet_name) + "*(此工作表无数据)*\n\n"
+
+    def shard_index(self, note, part_paths):
+        return self._header(self.layout.sheet_name) + f"*({note}:)*\n\n" + "".join(f"- [{path}](<{path}>)\n" for path in part_paths)
+
+    def _table_head(self):
+        layout = self.layout
+        return ("| " + " | ".join([""] + layout.letters) + " |\n"
+                + "|:" + "--:|:" + ":|".join(["--"] * (layout.max_c - layout.min_c + 1)) + "|\n")
+
+class MarkdownPlainRenderer(MarkdownRenderer):
+    """标准 Markdown 表格, 合并的单元格只在左上角显示内容。"""
+    suffix = "_visual_plain.md"
+
+    def begin_table(self, title, lo, hi):
+        return self._header(title) + self._table_head()
+
+    def row(self, r_idx, row_ids):
+        layout = self.layout
+        texts, merged, min_c = layout.texts, layout.merged, layout.min_c
+        line_data_md = [f"**{r_idx}**"] + [texts[text_id] for text_id in row_ids]
+        if merged and merged.in_row(r_idx):
+            for c_idx in range(min_c, layout.max_c + 1):
+                if merged.is_secondary(r_idx, c_idx): line_data_md[c_idx - min_c + 1] = ""
+        return "| " + " | ".join(line_data_md) + " |\n"
+
+class MarkdownRichRenderer(MarkdownRenderer):
+    """
+    富文本 Markdown: 每段表格中有合并区域时使用带 colspan/rowspan 的 HTML 表格, 否则为普通表格。
+    只看与本段的行及表格的列相交的合并区域, 拆分后没有合并的部分仍为普通表格。
+    """
+    suffix = "_visual_rich.md"
+
+    def __init__(self, layout):
+        super().__init__(layout)
+        self.html = False
+        self.lo = self.hi = None
+
+    def begin_table(self, title, lo, hi):
+        layout = self.layout
+        self.lo, self.hi = lo, hi
+        self.html = any(min_row <= hi and max_row >= lo and min_col <= layout.max_c and max_col >= layout.min_c
+                        for min_col, min_row, max_col, max_row in layout.merged)
+        if not self.html: return self._header(title) + self._table_head()
+        return (self._header(title) + "<table>\n  <thead>\n    <tr>\n      <th></th>\n"
+                + "".join(f"      <th>{letter}</th>\n" for letter in self.layout.letters)
+                + "    </tr>\n  </thead>\n  <tbody>\n")
+
+    def row(self, r_idx, row_ids):
+        layout = self.layout
+        texts = layout.texts
+        if not self.html:
+            return "| " + " | ".join([f"**{r_idx}**"] + [texts[text_id] for text_id in row_ids]) + " |\n"
+        merged, min_c, lo, hi = layout.merged, layout.min_c, self.lo, self.hi
+        row_html = f"    <tr>\n      <td><b>{r_idx}</b></td>\n"
+        for c_idx, text_id in enumerate(row_ids, start=min_c):
+            span = merged.find(r_idx, c_idx)
+            if span is None:
+                row_html += f"      <td>{texts[text_id]}</td>\n"
+            # 被拆分边界或所选范围截断的合并区域只合并表格内的部分
+            elif (max(span[1], lo), max(span[0], min_c)) == (r_idx, c_idx):
+                colspan = min(span[2], layout.cut_max_c) - max(span[0], min_c) + 1
+                rowspan = (min(span[3], hi) if hi < layout.max_r else span[3]) - max(span[1], lo) + 1
+                row_html += f'      <td colspan="{colspan}" rowspan="{rowspan}">{texts[text_id]}</td>\n'
+        return row_html + "    </tr>\n"
+
+    def end_table(self):
+        return "  </tbody>\n</table>\n" if self.html else ""
+
+# 可视化格式与其渲染器, 顺序即各格式的写出顺序
+RENDERERS = {
+    'txt': TxtRenderer,
+    'md_plain': MarkdownPlainRenderer,
+    'md_rich': MarkdownRichRenderer,
+}
@@ -0,0 +1,561 @@
+"""
+Excel 工作簿读取后端。
+
+- XmlWorkbookReader: 直接增量解析 xlsx 包内的工作表 XML, 每个工作表只解析一次,
+  同时得到公式文本与缓存值。批注、超链接、合并单元格和条件格式从各自的部件中读取。
+- OpenpyxlStreamingReader: 基于 load_workbook(read_only=True), 公式与缓存值两个工作表按行同步遍历。
+- OpenpyxlWorkbookReader: 基于两次完整的 openpyxl.load_workbook, 作为兼容性回退。
+
+所有后端向导出流程提供相同的接口: sheetnames、named_ranges(sheet_name) (及分开的 global_named_ranges() 与 local_named_ranges(sheet_name))、open_sheet(sheet_name) 与 sheet_fingerprint(sheet_name)。
+open_sheet 返回的对象提供 merged_ranges、conditional_formatting 以及按行流式产出单元格的 iter_rows()。
+open_sheet 的 bounds 为要导出的范围 (min_col, min_row, max_col, max_row), XML 引擎不解析范围外的单元格,
+并在读过范围的最后一行后停止解析; 其他引擎忽略此参数, 由调用方过滤。
+sheet_fingerprint 返回决定该工作表导出结果的全部内容的哈希, 供导出缓存判断工作表是否变化; 无法提供时返回 None。
+"""
+import hashlib
+import re
+import warnings
+from collections import namedtuple
+from copy import copy
+from xml.etree.ElementTree import XMLPullParser, iterparse
+
+import openpyxl
+from openpyxl.comments.comment_sheet import CommentSheet
+from openpyxl.formatting.formatting import ConditionalFormatting, ConditionalFormattingList
+from openpyxl.formula.translate import Translator
+from openpyxl.packaging.relationship import RelationshipList, get_dependents, get_rels_path
+from openpyxl.reader.excel import ExcelReader
+from openpyxl.styles.stylesheet import apply_stylesheet
+from openpyxl.utils.cell import coordinate_to_tuple, get_column_letter, range_boundaries
+from openpyxl.utils.datetime import from_excel, from_ISO8601
+from openpyxl.cell.text import Text
+from openpyxl.worksheet.formula import ArrayFormula, DataTableFormula
+from openpyxl.worksheet.hyperlink import HyperlinkList
+from openpyxl.xml.constants import ARC_STYLE, COMMENTS_NS, SHEET_MAIN_NS
+from openpyxl.xml.functions import fromstring
+
+from merged_ranges import MergedRangeIndex
+
+ENGINES = ('xml', 'openpyxl-stream', 'openpyxl')
+
+SHEET_DATA_TAG = f'{{{SHEET_MAIN_NS}}}sheetData'
+ROW_TAG = f'{{{SHEET_MAIN_NS}}}row'
+CELL_TAG = f'{{{SHEET_MAIN_NS}}}c'
+VALUE_TAG = f'{{{SHEET_MAIN_NS}}}v'
+FORMULA_TAG = f'{{{SHEET_MAIN_NS}}}f'
+INLINE_STRING_TAG = f'{{{SHEET_MAIN_NS}}}is'
+MERGE_CELL_TAG = f'{{{SHEET_MAIN_NS}}}mergeCell'
+HYPERLINKS_TAG = f'{{{SHEET_MAIN_NS}}}hyperlinks'
+CF_TAG = f'{{{SHEET_MAIN_NS}}}conditionalFormatting'
+
+SHEET_DATA_OPEN_RE = re.compile(rb'<(?:[\w.-]+:)?sheetData\b[^>]*?(/?)>')
+SHEET_DATA_CLOSE_RE = re.compile(rb'</(?:[\w.-]+:)?sheetData\s*>')
+READ_CHUNK_SIZE = 1 << 20
+# 匹配引用共享字符串的单元格 (t="s") 及其字符串索引; 只用于计算工作表指纹, 不参与解析
+SHARED_STRING_CELL_RE = re.compile(rb'<(?:[\w.-]+:)?c\b[^>]*?\bt="s"[^>]*>\s*<(?:[\w.-]+:)?v>\s*(\d+)\s*<')
+CELL_OPEN_RE = re.compile(rb'<(?:[\w.-]+:)?c\b')
+
+# 单个单元格的读取结果。
+# value 为缓存值 (等同于 data_only=True 时的值); formula 为公式 (字符串、ArrayFormula 或 DataTableFormula);
+# data_type 为公式视图下的类型 (含公式时为 'f'); comment/hyperlink 为 openpyxl 的 Comment/Hyperlink 对象。
+CellRecord = namedtuple('CellRecord', ['value', 'formula', 'data_type', 'comment', 'hyperlink'])
+EMPTY_CELL = CellRecord(None, None, 'n', None, None)
+
+
+class SheetAnnotations:
+    """工作表中位于单元格数据之外的信息: 合并单元格、条件格式、批注与超链接。"""
+
+    def __init__(self):
+        self.merged_ranges = MergedRangeIndex()
+        self.conditional_formatting = ConditionalFormattingList()
+        self.comments = {}
+        self.hyperlinks = {}
+
+
+class StreamingSheet:
+    """按行流式产出单元格的工作表。内存占用只取决于最宽的一行, 与工作表总行数无关。"""
+
+    def __init__(self, raw_rows, annotations):
+        self._raw_rows = raw_rows
+        self._annotations = annotations
+        self.merged_ranges = annotations.merged_ranges
+        self.conditional_formatting = annotations.conditional_formatting
+
+    def iter_rows(self):
+        """
+        依次产出 (行号, [(列号, CellRecord), ...]), 只包含有内容的单元格, 跳过空行。
+        合并区域中被覆盖的单元格会被清空, 批注与超链接会绑定到对应单元格上。
+        """
+        annotations = self._annotations
+        merged = annotations.merged_ranges
+        comments, hyperlinks = annotations.comments, annotations.hyperlinks
+        annotated_rows = {}
+        for r, c in comments.keys() | hyperlinks.keys():
+            annotated_rows.setdefault(r, set()).add(c)
+        pending_rows = sorted(annotated_rows)
+        pos = 0
+
+        for r_idx, row_cells in self._raw_rows:
+            while pos < len(pending_rows) and pending_rows[pos] < r_idx:
+                r = pending_rows[pos]
+                yield r, [(c, _annotate(EMPTY_CELL, (r, c), comments, hyperlinks)) for c in sorted(annotated_rows[r])]
+                pos += 1
+            if merged and merged.in_row(r_idx):
+                row_cells = [(c, cell) for c, cell in row_cells if not merged.is_secondary(r_idx, c)]
+            if pos < len(pending_rows) and pending_rows[pos] == r_idx:
+                row_map = dict(row_cells)
+                for c in annotated_rows[r_idx]:
+                    row_map[c] = _annotate(row_map.get(c, EMPTY_CELL), (r_idx, c), comments, hyperlinks)
+                row_cells = sorted(row_map.items())
+                pos += 1
+            if row_cells:
+                yield r_idx, row_cells
+
+        for r in pending_rows[pos:]:
+            yield r, [(c, _annotate(EMPTY_CELL, (r, c), comments, hyperlinks)) for c in sorted(annotated_rows[r])]
+
+
+def _annotate(cell, key, comments, hyperlinks):
+    """为单元格绑定批注与超链接; 与 openpyxl 一致, 没有值的单元格以链接目标作为其值。"""
+    comment = comments.get(key, cell.comment)
+    link = hyperlinks.get(key, cell.hyperlink)
+    value = cell.value
+    if link is not None and value is None:
+        value = link.target or link.location
+    return cell._replace(value=value, comment=comment, hyperlink=link)
+
+
+def _cast_number(value):
+    """与 openpyxl 一致地将数字字符串转换为 int 或 float。"""
+    if "." in value or "E" in value or "e" in value:
+        return float(value)
+    return int(value)
+
+
+def _iter_sheet_tail_elements(src):
+    """
+    解析工作表 XML 中 <sheetData> 以外的部分。
+    <sheetData> 内部的字节只做解压和查找结束标记, 不经过 XML 解析器。
+    """
+    parser = XMLPullParser(events=('end',))
+    buffer = b''
+    state = 'head'
+    while True:
+        chunk = src.read(READ_CHUNK_SIZE)
+        buffer += chunk
+        if state == 'head':
+            match = SHEET_DATA_OPEN_RE.search(buffer)
+            if match:
+                parser.feed(buffer[:match.end()])
+                buffer = buffer[match.end():]
+                state = 'tail' if match.group(1) else 'data'
+            elif not chunk:
+                parser.feed(buffer)
+                buffer = b''
+        if state == 'data':
+            # 先用子串查找排除不含结束标记的块, 单元格数据只需解压, 不必逐字节经过正则
+            match = SHEET_DATA_CLOSE_RE.search(buffer) if b'sheetData' in buffer else None
+            if match:
+                buffer = buffer[match.start():]
+                state = 'tail'
+            else:
+                buffer = buffer[-32:]
+        if state == 'tail':
+            parser.feed(buffer)
+            buffer = b''
+        for _, element in parser.read_events():
+            yield element
+        if not chunk:
+            break
+    parser.close()
+
+
+def _read_sheet_annotations(archive, sheet_path, valid_files, differential_styles):
+    """
+    读取工作表的合并单元格、条件格式、超链接及批注部件。
+    合并单元格与超链接在 XML 中位于 <sheetData> 之后, 但按行产出单元格时就要用到 (清空被合并覆盖的单元格、绑定超链接),
+    因此在读取单元格之前单独扫描一遍; 这一遍只解压 <sheetData> 部分, 不做 XML 解析。
+    """
+    rels_path = get_rels_path(sheet_path)
+    rels = get_dependents(archive, rels_path) if rels_path in valid_files else RelationshipList()
+    annotations = SheetAnnotations()
+    links = []
+
+    with archive.open(sheet_path) as src:
+        for element in _iter_sheet_tail_elements(src):
+            tag = element.tag
+            if tag == MERGE_CELL_TAG:
+                annotations.merged_ranges.add(range_boundaries(element.get('ref')))
+            elif tag == HYPERLINKS_TAG:
+                links = HyperlinkList.from_tree(element).hyperlink
+            elif tag == CF_TAG:
+                try:
+                    cf = ConditionalFormatting.from_tree(element)
+                except TypeError as e:
+                    warnings.warn(f"无法读取条件格式规则, 已忽略。原因: {e}")
+                    continue
+                for rule in cf.rules:
+                    if rule.dxfId is not None:
+                        rule.dxf = differential_styles[rule.dxfId]
+                    annotations.conditional_formatting[cf] = rule
+
+    merged = annotations.merged_ranges
+    for rel in rels.find(COMMENTS_NS):
+        comment_sheet = CommentSheet.from_tree(fromstring(archive.read(rel.target)))
+        for ref, comment in comment_sheet.comments:
+            key = coordinate_to_tuple(ref)
+            if not merged.is_secondary(*key):
+                annotations.comments[key] = comment
+
+    for link in links:
+        if link.id:
+            link.target = rels.get(link.id).Target
+        if ":" in link.ref:
+            min_col, min_row, max_col, max_row = range_boundaries(link.ref)
+            for r in range(min_row, max_row + 1):
+                for c in range(min_col, max_col + 1):
+                    if not merged.is_secondary(r, c):
+                        annotations.hyperlinks[(r, c)] = copy(link)
+        else:
+            key = coordinate_to_tuple(link.ref)
+            annotations.hyperlinks[merged.primary_of(*key) or key] = link
+
+    return annotations
+
+
+def _last_cell_open(data):
+    """最后一个单元格开始标签的位置, 没有时为 -1。常见的无前缀写法从末尾直接查找, 只有带命名空间前缀的才逐个匹配。"""
+    pos = max(data.rfind(b'<c '), data.rfind(b'<c>'))
+    if pos >= 0: return pos
+    last_open = None
+    for last_open in CELL_OPEN_RE.finditer(data): pass
+    return -1 if last_open is None else last_open.start()
+
+def _sheet_fingerprint(archive, sheet_path, valid_files, shared_strings, workbook_context):
+    """
+    计算工作表指纹: 工作表 XML 部件、它引用的共享字符串、关系文件及其指向的部件 (批注、绘图等)、
+    样式表以及调用方给出的工作簿级信息 (工作表名、命名区域、日期纪元)。
+    共享字符串只计入该表实际引用的条目, 其他工作表增删字符串导致的整体变化不会使本表失效。
+    """
+    digest = hashlib.sha256(repr(workbook_context).encode('utf-8'))
+    string_indices = set()
+    with archive.open(sheet_path) as src:
+        pending = b''
+        while (chunk := src.read(READ_CHUNK_SIZE)):
+            digest.update(chunk)
+            pending += chunk
+            # 只扫描到最后一个单元格的开始标签之前, 剩余部分与下一块拼接, 避免单元格被块边界截断
+            last_open = _last_cell_open(pending)
+            if last_open < 0: continue
+            string_indices.update(SHARED_STRING_CELL_RE.findall(pending, 0, last_open))
+            pending = pending[last_open:]
+    string_indices.update(SHARED_STRING_CELL_RE.findall(pending))
+    for index in sorted(int(i) for i in string_indices):
+        value = shared_strings[index] if index < len(shared_strings) else None
+        digest.update(f"\0s{index}\0{value}".encode('utf-8'))
+
+    related_parts = [ARC_STYLE]
+    rels_path = get_rels_path(sheet_path)
+    if rels_path in valid_files:
+        related_parts.append(rels_path)
+        related_parts.extend(rel.target for rel in get_dependents(archive, rels_path) if rel.TargetMode != 'External')
+    for part in related_parts:
+        if part in valid_files:
+            digest.update(f"\0p{part}\0".encode('utf-8'))
+            digest.update(archive.read(part))
+    return digest.hexdigest()
+
+
+class XmlWorkbookReader:
+    """单次解析工作表 XML 的读取后端。"""
+
+    engine = 'xml'
+
+    def __init__(self, file_path):
+        # 复用 openpyxl 读取工作簿级别的小部件: 共享字符串、工作簿结构、命名区域与样式。
+        reader = ExcelReader(file_path, read_only=True)
+        reader.read_manifest()
+        reader.read_strings()
+        reader.read_workbook()
+        apply_stylesheet(reader.archive, reader.wb)
+
+        self.archive = reader.archive
+        self.shared_strings = reader.shared_strings
+        self.epoch = reader.wb.epoch
+        self.date_formats = reader.wb._date_formats
+        self.timedelta_formats = reader.wb._timedelta_formats
+        self.differential_styles = reader.wb._differential_styles
+
+        valid_files = set(reader.valid_files)
+        self._sheet_parts = {}
+        self._sheet_index = {}
+        for idx, (sheet, rel) in enumerate(reader.parser.find_sheets()):
+            if rel.target not in valid_files or "chartsheet" in rel.Type:
+                continue
+            self._sheet_parts[sheet.name] = rel.target
+            self._sheet_index[sheet.name] = idx
+        self.sheetnames = list(self._sheet_parts)
+        self._valid_files = valid_files
+        self._names_by_sheet = reader.parser.defined_names.by_sheet()
+
+    def global_named_ranges(self):
+        """返回工作簿级 (全局) 的命名区域。"""
+        return {name: dest.attr_text for name, dest in self._names_by_sheet.get('global', {}).items()}
+
+    def local_named_ranges(self, sheet_name):
+        """返回只属于该工作表的局部命名区域。"""
+        return {name: dest.attr_text for name, dest in self._names_by_sheet.get(self._sheet_index[sheet_name], {}).items()
+                if dest.is_reserved is None}
+
+    def named_ranges(self, sheet_name):
+        """返回对该工作表可见的命名区域 (全局名称与该表的局部名称, 同名时局部名称优先)。"""
+        return {**self.global_named_ranges(), **self.local_named_ranges(sheet_name)}
+
+    def sheet_fingerprint(self, sheet_name):
+        context = (sheet_name, self.named_ranges(sheet_name), str(self.epoch))
+        return _sheet_fingerprint(self.archive, self._sheet_parts[sheet_name], self._valid_files, self.shared_strings, context)
+
+    def open_sheet(self, sheet_name, bounds=None):
+        sheet_path = self._sheet_parts[sheet_name]
+        annotations = _read_sheet_annotations(self.archive, sheet_path, self._valid_files, self.differential_styles)
+        return StreamingSheet(self._iter_raw_rows(sheet_path, bounds), annotations)
+
+    def _iter_raw_rows(self, sheet_path, bounds=None):
+        min_col, min_row, max_col, max_row = bounds or (None, None, None, None)
+        min_col, min_row = min_col or 1, min_row or 1
+        shared_formulae = {}
+        row_counter = 0
+        sheet_data = None
+        with self.archive.open(sheet_path) as src:
+            for event, element in iterparse(src, events=('start', 'end')):
+                if event == 'start':
+                    if element.tag == SHEET_DATA_TAG:
+                        sheet_data = element
+                    continue
+                if element.tag != ROW_TAG:
+                    continue
+                r = element.get('r')
+                row_counter = int(float(r)) if r is not None else row_counter + 1
+                if max_row is not None and row_counter > max_row:
+                    return
+                row_selected = row_counter >= min_row
+                col_counter = 0
+                row_cells = []
+                for cell_element in element:
+                    if cell_element.tag != CELL_TAG:
+                        continue
+                    coordinate = cell_element.get('r')
+                    if coordinate:
+                        _, col_counter = coordinate_to_tuple(coordinate)
+                    else:
+                        col_counter += 1
+                    if not row_selected or col_counter < min_col or (max_col is not None and col_counter > max_col):
+                        # 范围外的单元格不解析, 但共享公式的主单元格仍要记录, 范围内的单元格可能引用它
+                        formula_element = cell_element.find(FORMULA_TAG)
+                        if formula_element is not None and formula_element.get('t') == 'shared' and formula_element.get('si') not in shared_formulae:
+                            self._parse_formula(formula_element, row_counter, col_counter, shared_formulae)
+                        continue
+                    cell = self._parse_cell(cell_element, row_counter, col_counter, shared_formulae)
+                    if cell is not None:
+                        row_cells.append((col_counter, cell))
+                # 已处理的行立即从树中移除, 使内存占用不随行数增长
+                if sheet_data is not None:
+                    sheet_data.clear()
+                else:
+                    element.clear()
+                if row_cells:
+                    yield row_counter, row_cells
+
+    def _parse_cell(self, element, row, column, shared_formulae):
+        """解析单个 <c> 元素; 既没有值也没有公式的单元格返回 None。"""
+        data_type = element.get('t', 'n')
+        style_id = element.get('s', 0)
+        if style_id:
+            style_id = int(style_id)
+
+        formula = None
+        formula_element = element.find(FORMULA_TAG)
+        if formula_element is not None:
+            formula = self._parse_formula(formula_element, row, column, shared_formulae)
+
+        value = None
+        if data_type != "inlineStr":
+            value = element.findtext(VALUE_TAG, None) or None
+
+        if value is not None:
+            if data_type == 'n':
+                value = _cast_number(value)
+                if style_id in self.date_formats:
+                    data_type = 'd'
+                    try:
+                        value = from_excel(value, self.epoch, timedelta=style_id in self.timedelta_formats)
+                    except (OverflowError, ValueError):
+                        data_type = 'e'
+                        value = "#VALUE!"
+            elif data_type == 's':
+                value = self.shared_strings[int(value)]
+            elif data_type == 'b':
+                value = bool(int(value))
+            elif data_type == 'str':
+                data_type = 's'
+            elif data_type == 'd':
+                value = from_ISO8601(value)
+        elif data_type == 'inlineStr':
+            child = element.find(INLINE_STRING_TAG)
+            if child is not None:
+                data_type = 's'
+                value = Text.from_tree(child).content
+
+        if formula_element is not None:
+            return CellRecord(value, formula, 'f', None, None)
+        if value is None:
+            return None
+        return CellRecord(value, None, data_type, None, None)
+
+    def _parse_formula(self, element, row, column, shared_formulae):
+        """解析普通公式、数组公式、共享公式与模拟运算表公式, 与 openpyxl 的结果保持一致。"""
+        formula_type = element.get('t')
+        value = "="
+        if element.text is not None:
+            value += element.text
+
+        if formula_type == "array":
+            return ArrayFormula(ref=element.get('ref'), text=value)
+        if formula_type == "shared":
+            idx = element.get('si')
+            coordinate = f"{get_column_letter(column)}{row}"
+            if idx in shared_formulae:
+                return shared_formulae[idx].translate_formula(coordinate)
+            if value != "=":
+                shared_formulae[idx] = Translator(value, coordinate)
+        elif formula_type == "dataTable":
+            return DataTableFormula(**element.attrib)
+        return value
+
+
+def _openpyxl_global_named_ranges(wb):
+    """返回 openpyxl 工作簿中工作簿级 (全局) 的命名区域。"""
+    return {name: dest.attr_text for name, dest in wb.defined_names.items()}
+
+def _openpyxl_local_named_ranges(wb, sheet_name):
+    """返回 openpyxl 工作簿中只属于该工作表的局部命名区域。"""
+    return {name: dest.attr_text for name, dest in wb[sheet_name].defined_names.items()}
+
+
+class OpenpyxlStreamingReader:
+    """
+    基于 openpyxl 只读模式的流式读取后端。
+    公式与缓存值两个只读工作表按行同步遍历; 只读模式不提供的合并单元格、条件格式、批注与超链接
+    由与 XML 引擎相同的方式从各自的部件中读取。
+    """
+
+    engine = 'openpyxl-stream'
+
+    def __init__(self, file_path):
+        self.wb_formulas = openpyxl.load_workbook(file_path, read_only=True, data_only=False)
+        self.wb_values = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+        self.sheetnames = self.wb_formulas.sheetnames
+        self._valid_files = set(self.wb_formulas._archive.namelist())
+
+    def global_named_ranges(self):
+        return _openpyxl_global_named_ranges(self.wb_formulas)
+
+    def local_named_ranges(self, sheet_name):
+        return _openpyxl_local_named_ranges(self.wb_formulas, sheet_name)
+
+    def named_ranges(self, sheet_name):
+        return {**self.global_named_ranges(), **self.local_named_ranges(sheet_name)}
+
+    def sheet_fingerprint(self, sheet_name):
+        wb = self.wb_formulas
+        context = (sheet_name, self.named_ranges(sheet_name), str(wb.epoch))
+        return _sheet_fingerprint(wb._archive, wb[sheet_name]._worksheet_path, self._valid_files, wb.shared_strings, context)
+
+    def open_sheet(self, sheet_name, bounds=None):
+        sheet_formulas = self.wb_formulas[sheet_name]
+        sheet_values = self.wb_values[sheet_name]
+        # 忽略 <dimension> 声明的尺寸: 被多余格式撑大的尺寸会让 openpyxl 补齐大量空行空列
+        sheet_formulas.reset_dimensions()
+        sheet_values.reset_dimensions()
+        annotations = _read_sheet_annotations(self.wb_formulas._archive, sheet_formulas._worksheet_path,
+                                              self._valid_files, self.wb_formulas._differential_styles)
+        return StreamingSheet(self._iter_raw_rows(sheet_formulas, sheet_values), annotations)
+
+    @staticmethod
+    def _iter_raw_rows(sheet_formulas, sheet_values):
+        rows = zip(sheet_formulas.iter_rows(), sheet_values.iter_rows(values_only=True))
+        for r_idx, (row_formulas, row_values) in enumerate(rows, start=1):
+            if not row_formulas:
+                continue
+            row_cells = []
+            for c_idx, (cell, value) in enumerate(zip(row_formulas, row_values), start=1):
+                if cell.data_type == 'f':
+                    row_cells.append((c_idx, CellRecord(value, cell.value, 'f', None, None)))
+                elif value is not None:
+                    row_cells.append((c_idx, CellRecord(value, None, cell.data_type, None, None)))
+            if row_cells:
+                yield r_idx, row_cells
+
+
+class OpenpyxlSheet:
+    """将 openpyxl 完整加载的公式/缓存值两个工作表包装为与 StreamingSheet 相同的接口。"""
+
+    def __init__(self, sheet_formulas, sheet_values):
+        self._sheet_formulas = sheet_formulas
+        self._sheet_values = sheet_values
+        self.merged_ranges = MergedRangeIndex(merged_range.bounds for merged_range in sheet_formulas.merged_cells.ranges)
+        self.conditional_formatting = sheet_formulas.conditional_formatting
+
+    def iter_rows(self):
+        rows = zip(self._sheet_formulas.iter_rows(), self._sheet_values.iter_rows(values_only=True))
+        for r_idx, (row_formulas, row_values) in enumerate(rows, start=1):
+            row_cells = []
+            for c_idx, (cell, value) in enumerate(zip(row_formulas, row_values), start=1):
+                if value is None and cell.data_type != 'f' and not cell.comment and not cell.hyperlink:
+                    continue
+                formula = cell.value if cell.data_type == 'f' else None
+                row_cells.append((c_idx, CellRecord(value, formula, cell.data_type, cell.comment, cell.hyperlink)))
+            if row_cells:
+                yield r_idx, row_cells
+
+
+class OpenpyxlWorkbookReader:
+    """基于 openpyxl 完整加载的读取后端。"""
+
+    engine = 'openpyxl'
+
+    def __init__(self, file_path):
+        self.wb_formulas = openpyxl.load_workbook(file_path, data_only=False)
+        self.wb_values = openpyxl.load_workbook(file_path, data_only=True)
+        self.sheetnames = self.wb_formulas.sheetnames
+
+    def global_named_ranges(self):
+        return _openpyxl_global_named_ranges(self.wb_formulas)
+
+    def local_named_ranges(self, sheet_name):
+        return _openpyxl_local_named_ranges(self.wb_formulas, sheet_name)
+
+    def named_ranges(self, sheet_name):
+        return {**self.global_named_ranges(), **self.local_named_ranges(sheet_name)}
+
+    def sheet_fingerprint(self, sheet_name):
+        # 完整加载后原始部件已不可用, 无法按工作表计算指纹
+        return None
+
+    def open_sheet(self, sheet_name, bounds=None):
+        return OpenpyxlSheet(self.wb_formulas[sheet_name], self.wb_values[sheet_name])
+
+
+def open_workbook_reader(file_path, engine='xml'):
+    """
+    按指定引擎打开工作簿。
+    xml 引擎无法打开文件时自动回退到 openpyxl。
+    """
+    if engine == 'xml':
+        try:
+            return XmlWorkbookReader(file_path)
+        except Exception as e:
+            print(f"提示: XML 解析引擎无法读取该文件 ({e}), 已回退到 openpyxl。")
+    if engine == 'openpyxl-stream':
+        return OpenpyxlStreamingReader(file_path)
+    return OpenpyxlWorkbookReader(file_path)